@@ -0,0 +1,182 @@
+"""
+Whitelisted group-by aggregates for the MCP `aggregate` tool.
+
+An aggregate measures one entity (tenders, awards or contracts) by its value,
+grouped by up to three dimensions. Everything is computed in one SQL query
+over the narrow tables: tender_summaries for tenders and tender_subresources
+(awards and contracts, one row each, with the idx_subres_rollup index) for
+the rest. Dimension and measure names map to fixed SQL expressions, so no
+caller input reaches the query text; filter values are bound as parameters.
+
+Contracts often carry neither a supplier nor a signing date; both fall back to
+those of the award the contract references (awardID).
+"""
+
+DIMENSIONS = ("status", "year", "month", "vendor", "procurement_method")
+MEASURES = ("count", "sum", "avg", "min", "max")
+MAX_GROUP_BY = 3
+MAX_ROWS = 1000
+
+_SUMMARY_JOIN = "JOIN tender_summaries ts ON ts.tender_id = s.tender_id"
+_AWARD_JOIN = """LEFT JOIN tender_subresources a
+        ON a.parent_type = 'tender' AND a.kind = 'awards'
+        AND a.tender_id = s.tender_id AND a.item_id = s.data->>'awardID'"""
+
+# entity -> source, value expression, optional joins, and
+# dimension -> (SQL expression, joins it needs)
+_ENTITIES = {
+    "tenders": {
+        "source": "tender_summaries ts",
+        "where": [],
+        "value": "ts.amount",
+        "joins": {"vendor": "LEFT JOIN LATERAL unnest(ts.suppliers) AS v(name) ON true"},
+        "dimensions": {
+            "status": ("ts.status", ()),
+            "year": ("NULLIF(ts.release_year, 0)", ()),
+            "month": ("left(ts.date_modified, 7)", ()),
+            "vendor": ("v.name", ("vendor",)),
+            "procurement_method": ("ts.procurement_method", ()),
+        },
+        # Filtering on vendor without grouping by it must not multiply tenders
+        "vendor_filter": "EXISTS (SELECT 1 FROM unnest(ts.suppliers) f(name) WHERE f.name ILIKE %(vendor)s)",
+    },
+    "awards": {
+        "source": "tender_subresources s",
+        "where": ["s.parent_type = 'tender'", "s.kind = 'awards'"],
+        "value": "s.amount",
+        "joins": {"summary": _SUMMARY_JOIN},
+        "dimensions": {
+            "status": ("s.data->>'status'", ()),
+            "year": ("EXTRACT(YEAR FROM s.item_date)::int", ()),
+            "month": ("to_char(s.item_date, 'YYYY-MM')", ()),
+            "vendor": ("s.party_name", ()),
+            "procurement_method": ("ts.procurement_method", ("summary",)),
+        },
+    },
+    "contracts": {
+        "source": "tender_subresources s",
+        "where": ["s.parent_type = 'tender'", "s.kind = 'contracts'"],
+        "value": "s.amount",
+        "joins": {"award": _AWARD_JOIN, "summary": _SUMMARY_JOIN},
+        "dimensions": {
+            "status": ("s.data->>'status'", ()),
+            "year": ("EXTRACT(YEAR FROM COALESCE(s.item_date, a.item_date))::int", ("award",)),
+            "month": ("to_char(COALESCE(s.item_date, a.item_date), 'YYYY-MM')", ("award",)),
+            "vendor": ("COALESCE(s.party_name, a.party_name)", ("award",)),
+            "procurement_method": ("ts.procurement_method", ("summary",)),
+        },
+    },
+}
+
+ENTITIES = tuple(_ENTITIES)
+
+
+def build_query(entity="contracts", group_by=("year",), measures=("count", "sum"), status=None,
+                vendor=None, procurement_method=None, year_from=None, year_to=None,
+                order_by=None, descending=True, limit=100):
+    """
+    SQL (with %(name)s parameters), parameters and output column names of an
+    aggregate. Raises ValueError for anything outside the whitelists.
+    """
+    if entity not in _ENTITIES:
+        raise ValueError(f"entity must be one of {list(ENTITIES)}")
+    group_by = list(dict.fromkeys(group_by or []))
+    measures = list(dict.fromkeys(measures or ["count"]))
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown dimension(s) {unknown}; choose from {list(DIMENSIONS)}")
+    if len(group_by) > MAX_GROUP_BY:
+        raise ValueError(f"group by at most {MAX_GROUP_BY} dimensions")
+    unknown = [m for m in measures if m not in MEASURES]
+    if unknown:
+        raise ValueError(f"unknown measure(s) {unknown}; choose from {list(MEASURES)}")
+    columns = group_by + measures
+    if order_by is not None and order_by not in columns:
+        raise ValueError(f"order_by must be one of the output columns {columns}")
+
+    spec = _ENTITIES[entity]
+    dims = spec["dimensions"]
+    joins = []
+    where = list(spec["where"])
+    params = {"limit": max(1, min(int(limit), MAX_ROWS))}
+
+    def need(*names):
+        for name in names:
+            if name not in joins:
+                joins.append(name)
+
+    for d in group_by:
+        need(*dims[d][1])
+
+    if status is not None:
+        need(*dims["status"][1])
+        where.append(f"{dims['status'][0]} = %(status)s")
+        params["status"] = status
+    if procurement_method is not None:
+        need(*dims["procurement_method"][1])
+        where.append(f"{dims['procurement_method'][0]} = %(procurement_method)s")
+        params["procurement_method"] = procurement_method
+    if vendor:
+        if "vendor" in group_by or "vendor_filter" not in spec:
+            need(*dims["vendor"][1])
+            where.append(f"{dims['vendor'][0]} ILIKE %(vendor)s")
+        else:
+            where.append(spec["vendor_filter"])
+        params["vendor"] = f"%{vendor}%"
+    for bound, op in (("year_from", ">="), ("year_to", "<=")):
+        value = year_from if bound == "year_from" else year_to
+        if value is not None:
+            need(*dims["year"][1])
+            where.append(f"{dims['year'][0]} {op} %({bound})s")
+            params[bound] = int(value)
+
+    value = spec["value"]
+    measure_sql = {
+        "count": "COUNT(*)",
+        "sum": f"SUM({value})",
+        "avg": f"AVG({value})",
+        "min": f"MIN({value})",
+        "max": f"MAX({value})",
+    }
+    select = [f"{dims[d][0]} AS {d}" for d in group_by]
+    select += [f"{measure_sql[m]} AS {m}" for m in measures]
+
+    if order_by is None:
+        # Time series read chronologically, anything else biggest first
+        if group_by and all(d in ("year", "month") for d in group_by):
+            order = [f"{d} ASC NULLS LAST" for d in group_by]
+        else:
+            order = [f"{measures[0]} DESC NULLS LAST"] + [f"{d} ASC NULLS LAST" for d in group_by]
+    else:
+        order = [f"{order_by} {'DESC' if descending else 'ASC'} NULLS LAST"]
+        order += [f"{d} ASC NULLS LAST" for d in group_by if d != order_by]
+
+    sql = f"""
+        SELECT {", ".join(select)}, COUNT(*) OVER () AS total_groups
+        FROM {spec["source"]}
+        {" ".join(spec["joins"][j] for j in joins)}
+        WHERE {" AND ".join(where) if where else "true"}
+        {"GROUP BY " + ", ".join(str(i + 1) for i in range(len(group_by))) if group_by else ""}
+        ORDER BY {", ".join(order)}
+        LIMIT %(limit)s
+    """
+    return sql, params, columns
+
+
+def format_result(entity, columns, rows, limit):
+    """Compact table: column names once, then one list of values per group."""
+    def plain(value):
+        # NUMERIC comes back as Decimal
+        if value is not None and not isinstance(value, (int, str)):
+            return float(value)
+        return value
+
+    groups = rows[0]["total_groups"] if rows else 0
+    return {
+        "entity": entity,
+        "columns": columns,
+        "rows": [[plain(row[c]) for c in columns] for row in rows],
+        "groups": groups,
+        "truncated": groups > len(rows),
+        "limit": limit,
+    }
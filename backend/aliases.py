@@ -0,0 +1,49 @@
+"""
+Identifier aliases for tender lookups.
+
+A tender can be requested by its ocid, its release id or the Portland
+BIDNBR identifiers listed in tender.identifiers. The importer records every
+one of them in tender_aliases so each resolves with a single primary-key
+probe instead of a scan over data->>'id'.
+"""
+
+from sqlalchemy import text
+
+ALIAS_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tender_aliases (
+        alias VARCHAR PRIMARY KEY,
+        tender_id VARCHAR NOT NULL
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tender_aliases_tender ON tender_aliases (tender_id);",
+    # Identifier scheme for BIDNBR aliases (NULL for ocids, release ids and tender ids)
+    "ALTER TABLE tender_aliases ADD COLUMN IF NOT EXISTS scheme VARCHAR;",
+]
+
+BIDNBR_SCHEME = 'US_OR-PDX-BS-BIDNBR'
+
+# Resolves any alias to the tenders row (used with a :tid parameter)
+RESOLVE_ALIAS_SQL = "tender_id = (SELECT tender_id FROM tender_aliases WHERE alias = :tid)"
+
+
+def extract_aliases(release, tender_id):
+    """Rows mapping every known identifier of a release to its tender_id."""
+    aliases = {a: None for a in (tender_id, release.get('ocid'), release.get('id')) if a}
+    for ident in (release.get('tender') or {}).get('identifiers') or []:
+        if ident.get('scheme') == BIDNBR_SCHEME and ident.get('id'):
+            aliases[str(ident['id'])] = BIDNBR_SCHEME
+    return [{"alias": str(a), "tender_id": tender_id, "scheme": scheme} for a, scheme in aliases.items()]
+
+
+def replace_aliases(conn, tender_ids, rows):
+    """Swap the aliases of the given tenders within the caller's transaction."""
+    conn.execute(text("DELETE FROM tender_aliases WHERE tender_id = ANY(:ids)"),
+                 {"ids": list(tender_ids)})
+    if rows:
+        # An identifier shared between tenders resolves to the most recently imported one
+        conn.execute(text("""
+            INSERT INTO tender_aliases (alias, tender_id, scheme)
+            VALUES (:alias, :tender_id, :scheme)
+            ON CONFLICT (alias) DO UPDATE SET tender_id = EXCLUDED.tender_id, scheme = EXCLUDED.scheme
+        """), rows)
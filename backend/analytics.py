@@ -0,0 +1,251 @@
+"""
+Columnar analytics snapshot of the tender database.
+
+After each import the importer flattens tenders, awards, contracts, items and
+transactions into Parquet files (export_snapshot). Aggregate questions are
+then answered in-process by DuckDB over those files, which keeps scan-heavy
+statistics off the Postgres heap that serves interactive traffic.
+
+pyarrow and duckdb are optional: without them (or before the first export)
+snapshot_available() is False and callers keep using their SQL queries.
+"""
+
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+try:
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # analytics snapshot disabled
+    duckdb = pa = pq = None
+
+ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "/data/analytics")
+
+EXPORT_CHUNK_ROWS = 50000
+
+# Table name -> (Postgres query, Parquet schema as (column, arrow type name))
+SNAPSHOT_TABLES = {
+    "tenders": ("""
+        SELECT
+            tender_id,
+            title,
+            data->'tender'->>'status' AS status,
+            (data->'tender'->'value'->>'amount')::float8 AS amount,
+            data->'tender'->'value'->>'currency' AS currency,
+            data->'tender'->>'procurementMethod' AS procurement_method,
+            data->'tender'->'procuringEntity'->>'name' AS buyer,
+            NULLIF(data->>'date', '')::timestamp AS date,
+            NULLIF(data->'tender'->'tenderPeriod'->>'startDate', '')::timestamp AS start_date,
+            NULLIF(data->'tender'->'tenderPeriod'->>'endDate', '')::timestamp AS end_date,
+            complexity
+        FROM tenders
+    """, [("tender_id", "string"), ("title", "string"), ("status", "string"), ("amount", "float64"),
+          ("currency", "string"), ("procurement_method", "string"), ("buyer", "string"),
+          ("date", "timestamp"), ("start_date", "timestamp"), ("end_date", "timestamp"),
+          ("complexity", "int64")]),
+    "awards": ("""
+        SELECT tender_id, item_id AS award_id, data->>'status' AS status, amount::float8 AS amount,
+               data->'value'->>'currency' AS currency, item_date AS date, party_name AS supplier
+        FROM tender_subresources
+        WHERE parent_type = 'tender' AND kind = 'awards'
+    """, [("tender_id", "string"), ("award_id", "string"), ("status", "string"), ("amount", "float64"),
+          ("currency", "string"), ("date", "timestamp"), ("supplier", "string")]),
+    "contracts": ("""
+        SELECT tender_id, item_id AS contract_id, data->>'status' AS status, amount::float8 AS amount,
+               data->'value'->>'currency' AS currency, item_date AS date_signed, party_name AS supplier,
+               jsonb_array_length(COALESCE(data->'items', '[]'::jsonb)) AS item_count,
+               jsonb_array_length(COALESCE(data->'milestones', '[]'::jsonb)) AS milestone_count,
+               jsonb_array_length(COALESCE(data->'implementation'->'transactions', '[]'::jsonb)) AS transaction_count,
+               jsonb_array_length(COALESCE(data->'implementation'->'purchaseOrders', '[]'::jsonb)) AS purchase_order_count
+        FROM tender_subresources
+        WHERE parent_type = 'tender' AND kind = 'contracts'
+    """, [("tender_id", "string"), ("contract_id", "string"), ("status", "string"), ("amount", "float64"),
+          ("currency", "string"), ("date_signed", "timestamp"), ("supplier", "string"),
+          ("item_count", "int64"), ("milestone_count", "int64"), ("transaction_count", "int64"),
+          ("purchase_order_count", "int64")]),
+    "items": ("""
+        SELECT tender_id, parent_type, parent_id, item_id, title AS description,
+               (data->>'quantity')::float8 AS quantity,
+               data->'classification'->>'id' AS classification_id
+        FROM tender_subresources
+        WHERE kind = 'items'
+    """, [("tender_id", "string"), ("parent_type", "string"), ("parent_id", "string"), ("item_id", "string"),
+          ("description", "string"), ("quantity", "float64"), ("classification_id", "string")]),
+    "transactions": ("""
+        SELECT tender_id, parent_id AS contract_id, item_id AS transaction_id, amount::float8 AS amount,
+               data->'value'->>'currency' AS currency, item_date AS date, party_name AS payee
+        FROM tender_subresources
+        WHERE parent_type = 'contract' AND kind = 'transactions'
+    """, [("tender_id", "string"), ("contract_id", "string"), ("transaction_id", "string"),
+          ("amount", "float64"), ("currency", "string"), ("date", "timestamp"), ("payee", "string")]),
+}
+
+# Whitelisted rollups: entity -> (table, amount column, date column, party column)
+ROLLUP_ENTITIES = {
+    "tenders": ("tenders", "amount", "date", "buyer"),
+    "awards": ("awards", "amount", "date", "supplier"),
+    "contracts": ("contracts", "amount", "date_signed", "supplier"),
+    "transactions": ("transactions", "amount", "date", "payee"),
+}
+ROLLUP_DIMENSIONS = {"year", "month", "status", "party"}
+
+_local = threading.local()
+
+
+def _arrow_schema(columns):
+    types = {
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+        "timestamp": pa.timestamp("us"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def _path(table, directory=None):
+    return os.path.join(directory or ANALYTICS_DIR, f"{table}.parquet")
+
+
+def snapshot_available(directory=None):
+    return duckdb is not None and os.path.exists(_path("tenders", directory))
+
+
+def export_snapshot(engine, directory=None):
+    """
+    Write every snapshot table to Parquet and return {table: row_count}.
+
+    Each file is streamed in chunks to a temporary name and renamed into
+    place, so concurrent readers always see a complete file.
+    """
+    if pq is None:
+        print("Skipping analytics snapshot: pyarrow/duckdb not installed")
+        return {}
+
+    directory = directory or ANALYTICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    started = time.monotonic()
+    counts = {}
+
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for table, (sql, columns) in SNAPSHOT_TABLES.items():
+            schema = _arrow_schema(columns)
+            names = [name for name, _ in columns]
+            tmp_path = _path(table, directory) + ".tmp"
+            rows_written = 0
+
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                result = conn.execute(text(sql))
+                while True:
+                    rows = result.fetchmany(EXPORT_CHUNK_ROWS)
+                    if not rows:
+                        break
+                    chunk = {name: [row[i] for row in rows] for i, name in enumerate(names)}
+                    writer.write_table(pa.Table.from_pydict(chunk, schema=schema))
+                    rows_written += len(rows)
+
+            os.replace(tmp_path, _path(table, directory))
+            counts[table] = rows_written
+
+    print(f"Analytics snapshot written to {directory} in {time.monotonic() - started:.1f}s: {counts}")
+    return counts
+
+
+def _cursor():
+    # DuckDB connections must not be shared between threads, so keep one per thread
+    if not hasattr(_local, "con"):
+        _local.con = duckdb.connect(database=":memory:")
+    return _local.con.cursor()
+
+
+def query(sql_template, params=None, directory=None):
+    """Run DuckDB SQL where {tenders}, {awards}, ... expand to Parquet scans."""
+    sources = {table: f"read_parquet('{_path(table, directory)}')" for table in SNAPSHOT_TABLES}
+    cur = _cursor()
+    try:
+        cur.execute(sql_template.format(**sources), params or [])
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def overview():
+    """Same shape as the /tenders/stats response, computed from the snapshot."""
+    row = query("""
+        SELECT
+            (SELECT COUNT(*) FROM {tenders}) AS tenders,
+            (SELECT COUNT(*) FROM {contracts}) AS contracts,
+            (SELECT COALESCE(SUM(item_count), 0) FROM {contracts}) AS items,
+            (SELECT COALESCE(SUM(milestone_count), 0) FROM {contracts}) AS milestones,
+            (SELECT COALESCE(SUM(transaction_count), 0) FROM {contracts}) AS transactions,
+            (SELECT COALESCE(SUM(purchase_order_count), 0) FROM {contracts}) AS purchase_orders,
+            (SELECT COALESCE(SUM(amount), 0) FROM {awards}) AS total_award_value,
+            (SELECT MIN(LEAST(start_date, date)) FROM {tenders}) AS min_date,
+            (SELECT MAX(GREATEST(COALESCE(end_date, TIMESTAMP '1900-01-01'), COALESCE(date, TIMESTAMP '1900-01-01')))
+             FROM {tenders}) AS max_date
+    """)[0]
+    return {
+        "tenders": row["tenders"] or 0,
+        "contracts": row["contracts"] or 0,
+        "items": int(row["items"] or 0),
+        "milestones": int(row["milestones"] or 0),
+        "transactions": int(row["transactions"] or 0),
+        "purchaseOrders": int(row["purchase_orders"] or 0),
+        "totalAwardValue": float(row["total_award_value"] or 0),
+        "minDate": row["min_date"].isoformat() if row["min_date"] else None,
+        "maxDate": row["max_date"].isoformat() if row["max_date"] else None
+    }
+
+
+def status_summary():
+    """Tender count and total value per status."""
+    rows = query("""
+        SELECT status, COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total_value
+        FROM {tenders}
+        GROUP BY 1
+        ORDER BY 2 DESC
+    """)
+    return {
+        (row["status"] or "unknown"): {"count": row["count"], "totalValue": float(row["total_value"])}
+        for row in rows
+    }
+
+
+def rollup(entity="contracts", by="year", limit=100):
+    """
+    Count, sum, average, min and max of an entity's amount grouped by one
+    dimension (year, month, status or party - buyer/supplier/payee).
+    """
+    if entity not in ROLLUP_ENTITIES:
+        raise ValueError(f"entity must be one of {sorted(ROLLUP_ENTITIES)}")
+    if by not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"by must be one of {sorted(ROLLUP_DIMENSIONS)}")
+    if by == "status" and entity == "transactions":
+        raise ValueError("transactions have no status")
+
+    table, amount, date, party = ROLLUP_ENTITIES[entity]
+    key = {
+        "year": f"CAST(year({date}) AS VARCHAR)",
+        "month": f"strftime({date}, '%Y-%m')",
+        "status": "status",
+        "party": party,
+    }[by]
+    order = "1" if by in ("year", "month") else "sum DESC NULLS LAST"
+
+    rows = query(f"""
+        SELECT {key} AS key, COUNT(*) AS count, SUM({amount}) AS sum, AVG({amount}) AS avg,
+               MIN({amount}) AS min, MAX({amount}) AS max
+        FROM {{{table}}}
+        GROUP BY 1
+        ORDER BY {order}
+        LIMIT ?
+    """, [max(1, min(int(limit), 10000))])
+    for row in rows:
+        for measure in ("sum", "avg", "min", "max"):
+            if row[measure] is not None:
+                row[measure] = float(row[measure])
+    return {"entity": entity, "by": by, "rows": rows}
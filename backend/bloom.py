@@ -0,0 +1,111 @@
+"""
+Bloom-filter negative cache for tender identifier lookups.
+
+Every identifier that resolves to a tender (tender_id plus everything in
+tender_aliases) is added to a per-worker Bloom filter. A lookup the filter
+rejects cannot exist, so stale links and bot traffic are answered without
+touching the database; a positive answer still goes to the alias index.
+"""
+
+import hashlib
+import logging
+import math
+import time
+
+from sqlalchemy import text
+
+from rebuild import BackgroundRebuilder
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+_KNOWN_IDS_SQL = """
+    SELECT tender_id FROM tenders WHERE tender_id IS NOT NULL
+    UNION ALL
+    SELECT alias FROM tender_aliases
+"""
+
+
+class KnownTenderIds:
+    """
+    Rebuildable Bloom filter of every identifier that can resolve to a tender.
+
+    might_exist() answers True until the first build finishes, and again after
+    an 'everything changed' notification until the next build. Tender_ids named
+    in a change notification are admitted immediately; their new aliases
+    become visible after the coalesced rebuild that follows.
+    """
+
+    def __init__(self, engine, error_rate=0.001, min_rebuild_interval=5.0):
+        self.engine = engine
+        self.error_rate = error_rate
+        self._filter = None
+        self._rebuilder = BackgroundRebuilder("known-tender-ids", self.build, min_rebuild_interval)
+        self.rejected = 0
+        self.build_seconds = None
+
+    def build(self):
+        started = time.monotonic()
+        with self.engine.connect() as conn:
+            keys = [row[0] for row in conn.execute(text(_KNOWN_IDS_SQL))]
+        bloom = BloomFilter(int(len(keys) * 1.2) + 1000, self.error_rate)
+        for key in keys:
+            bloom.add(key)
+        self._filter = bloom
+        self.build_seconds = round(time.monotonic() - started, 3)
+        logger.info("Tender id filter built: %d identifiers in %.2fs", len(keys), self.build_seconds)
+
+    def start(self):
+        self._rebuilder.start()
+
+    def stop(self):
+        self._rebuilder.stop()
+
+    def on_change(self, tender_ids):
+        """Change-listener callback: admit new ids now, rebuild for their aliases."""
+        if tender_ids is None:
+            self._filter = None
+        elif self._filter is not None:
+            for tender_id in tender_ids:
+                self._filter.add(tender_id)
+        self._rebuilder.mark_stale(tender_ids)
+
+    def might_exist(self, identifier):
+        bloom = self._filter
+        if bloom is None or identifier in bloom:
+            return True
+        self.rejected += 1
+        return False
+
+    def stats(self):
+        bloom = self._filter
+        return {
+            "ready": bloom is not None,
+            "identifiers": bloom.count if bloom else 0,
+            "bytes": len(bloom.bits) if bloom else 0,
+            "rejected": self.rejected,
+            "buildSeconds": self.build_seconds,
+        }
@@ -0,0 +1,110 @@
+"""
+Request coalescing and admission control for expensive endpoints.
+
+SingleFlight collapses concurrent calls with the same key into one execution
+whose result (or exception) is handed to every caller. AdmissionLimiter caps
+how many of those executions run against the database at once, queues a
+bounded number of waiters and sheds the rest immediately.
+
+FastAPI runs the sync endpoints in a thread pool, so both are thread-based.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised when an endpoint has no capacity left for another request."""
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AdmissionLimiter:
+    def __init__(self, name, max_concurrent, max_queue, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded(self.name)
+            self.queued += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.queued -= 1
+            if not acquired:
+                self.rejected += 1
+                raise Overloaded(self.name)
+            self.running += 1
+            self.admitted += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self.running,
+                "queued": self.queued,
+                "maxConcurrent": self.max_concurrent,
+                "maxQueue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
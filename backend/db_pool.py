@@ -0,0 +1,404 @@
+"""
+Database connection pools for the MCP server.
+
+ConnectionPool is a thread-safe psycopg2 pool; AsyncConnectionPool is its
+asyncpg counterpart for the async tools, and ThreadedAsyncPool gives the
+psycopg2 pool the same async interface when asyncpg is not installed. The
+async pools share fetch()/fetchrow() taking psycopg2-style %(name)s
+parameters, so the MCP tools build their SQL once for either driver.
+
+ConnectionPool opens connections lazily up to `max_size` and hands them out
+one caller at a time; a caller that finds the pool exhausted waits up to
+`wait_timeout` seconds. Before a connection is reused it is health checked:
+closed or broken connections are dropped, connections idle for longer than
+`check_idle` seconds are pinged with SELECT 1, and connections older than
+`max_lifetime` are recycled. Each checkout runs in its own transaction with a statement timeout
+(SET LOCAL), and is rolled back on return so no state leaks between calls.
+
+Cancelling a task awaiting either async pool cancels its query on the server
+(asyncpg does this itself; ThreadedAsyncPool calls psycopg2's cancel()), so a
+client that disconnects or cancels a tool call does not leave work running.
+
+fetch() optionally takes the stats of the current tool call (tool_metrics.py)
+and reports the query's duration, rows and, in the same transaction, the
+rows it scanned.
+
+Both MCP transports (stdio and the serve_mcp.py HTTP wrapper) share the pool
+created in mcp_server.py; stats() is reported by serve_mcp.py.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+try:
+    import asyncpg
+except ImportError:  # psycopg2 pool only
+    asyncpg = None
+
+logger = logging.getLogger(__name__)
+
+# Rows read so far by the current transaction, by sequential and index scans
+SCANNED_ROWS_SQL = """
+    SELECT COALESCE(SUM(seq_tup_read + COALESCE(idx_tup_fetch, 0)), 0)::bigint AS scanned
+    FROM pg_stat_xact_user_tables
+"""
+
+_NAMED_PARAM = re.compile(r"%\((\w+)\)s")
+
+
+def to_positional(sql, params=None):
+    """Rewrite %(name)s placeholders as asyncpg's $1, $2, ...; returns (sql, args)."""
+    params = params or {}
+    numbers = {}
+
+    def number(match):
+        name = match.group(1)
+        if name not in numbers:
+            numbers[name] = len(numbers) + 1
+        return f"${numbers[name]}"
+
+    sql = _NAMED_PARAM.sub(number, sql)
+    return sql, [params[name] for name in numbers]
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection became free within the wait timeout."""
+
+
+class _Conn:
+    __slots__ = ("conn", "created", "last_used")
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    def __init__(self, dsn, min_size=1, max_size=10, wait_timeout=10.0,
+                 check_idle=30.0, max_lifetime=1800.0, application_name="portland-ocds-mcp"):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.check_idle = check_idle
+        self.max_lifetime = max_lifetime
+        self.application_name = application_name
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._size = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.failed_checks = 0
+        self.wait_timeouts = 0
+        self.statement_timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor, application_name=self.application_name)
+        conn.set_session(readonly=True)
+        with self._lock:
+            self._size += 1
+            self.created += 1
+        return _Conn(conn)
+
+    def _discard(self, entry):
+        with self._lock:
+            self._size -= 1
+            self.discarded += 1
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, entry):
+        if entry.conn.closed or time.monotonic() - entry.created > self.max_lifetime:
+            return False
+        if time.monotonic() - entry.last_used < self.check_idle:
+            return True
+        try:
+            with entry.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            entry.conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._lock:
+                self.failed_checks += 1
+            return False
+
+    def open(self):
+        """Open min_size connections up front (otherwise they open on first use)."""
+        with self._lock:
+            missing = self.min_size - self._size
+        for _ in range(max(missing, 0)):
+            entry = self._connect()
+            with self._lock:
+                self._idle.append(entry)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry)
+
+    def _checkout(self):
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.wait_timeout)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.waiting -= 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if not acquired:
+                self.wait_timeouts += 1
+        if not acquired:
+            raise PoolTimeout(f"no database connection free after {self.wait_timeout}s")
+
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    entry = self._connect()
+                    break
+                if self._healthy(entry):
+                    break
+                self._discard(entry)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+        return entry
+
+    def _checkin(self, entry, broken):
+        with self._lock:
+            self.in_use -= 1
+        if broken or entry.conn.closed:
+            self._discard(entry)
+        else:
+            entry.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(entry)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, statement_timeout_ms=None):
+        """Borrow a connection for one read-only transaction."""
+        entry = self._checkout()
+        broken = False
+        try:
+            if statement_timeout_ms:
+                with entry.conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s", (int(statement_timeout_ms),))
+            yield entry.conn
+        except psycopg2.extensions.QueryCanceledError:
+            with self._lock:
+                self.statement_timeouts += 1
+            raise
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if not broken:
+                try:
+                    entry.conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            self._checkin(entry, broken)
+
+    @contextmanager
+    def cursor(self, statement_timeout_ms=None):
+        with self.connection(statement_timeout_ms) as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "inUse": self.in_use,
+                "waiting": self.waiting,
+                "minSize": self.min_size,
+                "maxSize": self.max_size,
+                "checkouts": self.checkouts,
+                "created": self.created,
+                "discarded": self.discarded,
+                "failedHealthChecks": self.failed_checks,
+                "waitTimeouts": self.wait_timeouts,
+                "statementTimeouts": self.statement_timeouts,
+                "avgWaitMs": round(self.wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "maxWaitMs": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class ThreadedAsyncPool:
+    """Async interface over ConnectionPool: each query runs in a worker thread."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def open(self):
+        await asyncio.to_thread(self.pool.open)
+
+    async def close(self):
+        self.pool.close()
+
+    async def fetch(self, sql, params=None, statement_timeout_ms=None, stats=None):
+        connections = []
+
+        def run():
+            with self.pool.connection(statement_timeout_ms) as conn:
+                connections.append(conn)
+                with conn.cursor() as cur:
+                    started = time.monotonic()
+                    cur.execute(sql, params)
+                    rows = cur.fetchall()
+                    seconds = time.monotonic() - started
+                    scanned = None
+                    if stats is not None and stats.count_scanned:
+                        cur.execute(SCANNED_ROWS_SQL)
+                        scanned = cur.fetchone()["scanned"]
+                    return rows, seconds, scanned
+
+        try:
+            rows, seconds, scanned = await asyncio.get_running_loop().run_in_executor(None, run)
+        except asyncio.CancelledError:
+            # The worker thread cannot be interrupted, but its query can
+            if connections:
+                connections[0].cancel()
+            raise
+        if stats is not None:
+            stats.record(sql, params, len(rows), seconds, scanned)
+        return rows
+
+    async def fetchrow(self, sql, params=None, statement_timeout_ms=None, stats=None):
+        rows = await self.fetch(sql, params, statement_timeout_ms, stats)
+        return rows[0] if rows else None
+
+    def stats(self):
+        return {"driver": "psycopg2", **self.pool.stats()}
+
+
+class AsyncConnectionPool:
+    """asyncpg pool, opened on first use (inside the serving event loop) or by open()."""
+
+    def __init__(self, dsn, min_size=1, max_size=10, wait_timeout=10.0,
+                 max_inactive=300.0, application_name="portland-ocds-mcp"):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self.max_inactive = max_inactive
+        self.application_name = application_name
+        self._pool = None
+        self._opening = None
+        self.acquires = 0
+        self.wait_timeouts = 0
+        self.statement_timeouts = 0
+        self.cancelled = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @staticmethod
+    async def _init_connection(conn):
+        # Match psycopg2, which decodes json/jsonb columns
+        for name in ("json", "jsonb"):
+            await conn.set_type_codec(name, encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+    async def open(self):
+        if self._pool is None:
+            if self._opening is None:
+                self._opening = asyncio.ensure_future(asyncpg.create_pool(
+                    self.dsn,
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    max_inactive_connection_lifetime=self.max_inactive,
+                    init=self._init_connection,
+                    server_settings={"application_name": self.application_name},
+                ))
+            try:
+                self._pool = await asyncio.shield(self._opening)
+            except BaseException:
+                if self._opening.done():
+                    self._opening = None
+                raise
+        return self._pool
+
+    async def close(self):
+        pool, self._pool, self._opening = self._pool, None, None
+        if pool is not None:
+            await pool.close()
+
+    async def fetch(self, sql, params=None, statement_timeout_ms=None, stats=None):
+        pool = self._pool or await self.open()
+        query, args = to_positional(sql, params)
+        started = time.monotonic()
+        try:
+            conn = await pool.acquire(timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.wait_timeouts += 1
+            raise PoolTimeout(f"no database connection free after {self.wait_timeout}s")
+        waited = time.monotonic() - started
+        self.acquires += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            async with conn.transaction(readonly=True):
+                if statement_timeout_ms:
+                    await conn.execute(f"SET LOCAL statement_timeout = {int(statement_timeout_ms)}")
+                started = time.monotonic()
+                rows = await conn.fetch(query, *args)
+                seconds = time.monotonic() - started
+                scanned = None
+                if stats is not None and stats.count_scanned:
+                    scanned = await conn.fetchval(SCANNED_ROWS_SQL)
+            if stats is not None:
+                stats.record(sql, params, len(rows), seconds, scanned)
+            return [dict(row) for row in rows]
+        except asyncpg.QueryCanceledError:
+            self.statement_timeouts += 1
+            raise
+        except asyncio.CancelledError:
+            # asyncpg has already asked the server to cancel the query
+            self.cancelled += 1
+            raise
+        finally:
+            await pool.release(conn)
+
+    async def fetchrow(self, sql, params=None, statement_timeout_ms=None, stats=None):
+        rows = await self.fetch(sql, params, statement_timeout_ms, stats)
+        return rows[0] if rows else None
+
+    def stats(self):
+        pool = self._pool
+        return {
+            "driver": "asyncpg",
+            "size": pool.get_size() if pool else 0,
+            "idle": pool.get_idle_size() if pool else 0,
+            "inUse": pool.get_size() - pool.get_idle_size() if pool else 0,
+            "minSize": self.min_size,
+            "maxSize": self.max_size,
+            "checkouts": self.acquires,
+            "waitTimeouts": self.wait_timeouts,
+            "statementTimeouts": self.statement_timeouts,
+            "cancelled": self.cancelled,
+            "avgWaitMs": round(self.wait_seconds / self.acquires * 1000, 3) if self.acquires else 0.0,
+            "maxWaitMs": round(self.max_wait_seconds * 1000, 3),
+        }
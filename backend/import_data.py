@@ -6,6 +6,15 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy import create_engine, text
 from sqlalchemy.dialects.postgresql import insert
+from notifications import notify_tenders_changed
+from analytics import export_snapshot
+from subresources import SUBRESOURCE_DDL, extract_subresources, replace_subresources
+from aliases import ALIAS_DDL, extract_aliases, replace_aliases
+from warmup import warm_up, http_fetch
+import partitioning
+from partitioning import PARTITION_BY_YEAR, release_year
+from summaries import SUMMARY_DDL, refresh_summaries, backfill_summaries, set_document_compression
+from similarity import VECTOR_DDL, extract_vector, replace_vectors, backfill_vectors
 
 # Configuration
 DATA_FILE = "/data/record-package-latest.json"
@@ -141,9 +150,47 @@ def map_items(items, default_desc="Imported Item"):
         })
     return res
 
+# --- Complexity Score ---
+# Precomputed at import so sort_by=complexity can walk an index instead of
+# measuring arrays in every document at query time.
+
+COMPLEXITY_COMPONENTS = ["awards", "contracts", "documents", "items", "milestones", "transactions", "bids"]
+
+def _count(value):
+    if isinstance(value, list):
+        return len(value)
+    # OCDS bids extension nests the list under bids.details
+    if isinstance(value, dict):
+        return _count(value.get('details'))
+    return 0
+
+def compute_complexity(tender_data):
+    t = tender_data.get('tender') or {}
+    awards = tender_data.get('awards') or []
+    contracts = tender_data.get('contracts') or []
+
+    breakdown = {
+        "awards": len(awards),
+        "contracts": len(contracts),
+        "documents": _count(t.get('documents'))
+            + sum(_count(a.get('documents')) for a in awards)
+            + sum(_count(c.get('documents')) for c in contracts),
+        "items": _count(t.get('items')),
+        "milestones": _count(t.get('milestones'))
+            + sum(_count(c.get('milestones')) for c in contracts)
+            + sum(_count((c.get('implementation') or {}).get('milestones')) for c in contracts),
+        "transactions": sum(_count((c.get('implementation') or {}).get('transactions')) for c in contracts),
+        "bids": _count(tender_data.get('bids')),
+    }
+    breakdown["total"] = sum(breakdown[k] for k in COMPLEXITY_COMPONENTS)
+    return breakdown
+
 def run_import():
     print(f"Connecting to DB: {DATABASE_URL}")
     with engine.connect() as conn:
+        if PARTITION_BY_YEAR:
+            # No-op for existing tables; those are migrated below
+            partitioning.create_partitioned_tables(conn)
         # Create table if not exists (via simple SQL fallback)
         conn.execute(text("""
             CREATE TABLE IF NOT EXISTS tenders (
@@ -154,12 +201,36 @@ def run_import():
             );
         """))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_data ON tenders USING gin (data);"))
+        conn.execute(text("ALTER TABLE tenders ADD COLUMN IF NOT EXISTS complexity INTEGER NOT NULL DEFAULT 0;"))
+        conn.execute(text("ALTER TABLE tenders ADD COLUMN IF NOT EXISTS complexity_breakdown JSONB;"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_complexity ON tenders (complexity, id);"))
+        for ddl in SUBRESOURCE_DDL + ALIAS_DDL + SUMMARY_DDL + VECTOR_DDL + partitioning.YEAR_DDL:
+            conn.execute(text(ddl))
+        partitioning.backfill_release_years(conn)
+        if PARTITION_BY_YEAR:
+            for table in partitioning.PARTITIONED_DDL:
+                if partitioning.migrate(conn, table):
+                    print(f"Partitioned {table} by release year")
+            # Recreate the secondary indexes on the partitioned tables
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_data ON tenders USING gin (data);"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_complexity ON tenders (complexity, id);"))
+            for ddl in SUBRESOURCE_DDL + SUMMARY_DDL + partitioning.YEAR_DDL:
+                conn.execute(text(ddl))
+        partitioned = partitioning.is_partitioned(conn)
+        # Documents are cold storage; rows rewritten by this import pick up the method
+        set_document_compression(conn)
+        partitioning.ensure_existing_partitions(conn)
+        backfill_summaries(conn)
+        backfill_vectors(conn)
         conn.commit()
     
     print(f"Reading {DATA_FILE}...")
     
     count = 0
     batch = []
+    subresource_rows = []
+    alias_rows = []
+    vector_rows = []
     
     with open(DATA_FILE, 'rb') as f:
         for record in ijson.items(f, 'records.item'):
@@ -179,34 +250,76 @@ def run_import():
             # For raw SQL insert, we need string.
             # But let's use list of dicts.
             
+            complexity = compute_complexity(tender_data)
             batch.append({
                 "tender_id": row['tender_id'],
                 "title": row['title'],
-                "data": json.dumps(tender_data)
+                "data": json.dumps(tender_data),
+                "complexity": complexity["total"],
+                "complexity_breakdown": json.dumps(complexity),
+                "release_year": release_year(tender_data)
             })
+            subresource_rows.extend(extract_subresources(tender_data))
+            alias_rows.extend(extract_aliases(release, tender_data['id']))
+            vector_rows.append(extract_vector(tender_data))
             
             if len(batch) >= 1000:
-                insert_batch(batch)
+                insert_batch(batch, subresource_rows, alias_rows, partitioned, vector_rows)
                 count += len(batch)
                 print(f"Imported {count} records...")
                 batch = []
+                subresource_rows = []
+                alias_rows = []
+                vector_rows = []
 
         if batch:
-            insert_batch(batch)
+            insert_batch(batch, subresource_rows, alias_rows, partitioned, vector_rows)
             count += len(batch)
             print(f"Imported {count} records. Complete.")
 
-def insert_batch(batch):
+    # Refresh the Parquet snapshot used for aggregate analytics
+    export_snapshot(engine)
+
+    # Reload hot relations into shared buffers; with WARMUP_API_URL set, also
+    # replay the landing page against the API so its caches are refilled
+    api_url = os.getenv("WARMUP_API_URL")
+    report = warm_up(engine, http_fetch(api_url) if api_url else None)
+    print(f"Warm-up: {report['seconds']}s, {report.get('prewarmedBlocks', 0)} blocks prewarmed")
+    for request in report.get("requests", []):
+        print(f"  {request['name']}: {request['status']} {request.get('seconds', '')}")
+
+def insert_batch(batch, subresource_rows=(), alias_rows=(), partitioned=False, vector_rows=()):
     # Using raw SQL for speed and simplicity
     with engine.connect() as conn:
-        stmt = text("""
-            INSERT INTO tenders (tender_id, title, data)
-            VALUES (:tender_id, :title, :data)
-            ON CONFLICT (tender_id) DO UPDATE SET
+        tender_ids = [row["tender_id"] for row in batch]
+        if partitioned:
+            # Uniqueness is per partition: route rows to their year's partition and
+            # drop copies left in another year by a release whose date changed
+            partitioning.ensure_partitions(conn, [row["release_year"] for row in batch])
+            conn.execute(text("""
+                DELETE FROM tenders t
+                USING unnest(CAST(:ids AS varchar[]), CAST(:years AS smallint[])) AS n(tender_id, release_year)
+                WHERE t.tender_id = n.tender_id AND t.release_year <> n.release_year
+            """), {"ids": tender_ids, "years": [row["release_year"] for row in batch]})
+        stmt = text(f"""
+            INSERT INTO tenders (tender_id, title, data, complexity, complexity_breakdown, release_year)
+            VALUES (:tender_id, :title, :data, :complexity, :complexity_breakdown, :release_year)
+            ON CONFLICT ({"tender_id, release_year" if partitioned else "tender_id"}) DO UPDATE SET
                 title = EXCLUDED.title,
-                data = EXCLUDED.data;
+                data = EXCLUDED.data,
+                complexity = EXCLUDED.complexity,
+                complexity_breakdown = EXCLUDED.complexity_breakdown,
+                release_year = EXCLUDED.release_year;
         """)
         conn.execute(stmt, batch)
+        # Re-flatten the paginated arrays, identifier aliases, list summaries and
+        # similarity vectors of these tenders
+        replace_subresources(conn, tender_ids, list(subresource_rows))
+        replace_aliases(conn, tender_ids, list(alias_rows))
+        refresh_summaries(conn, tender_ids)
+        replace_vectors(conn, tender_ids, list(vector_rows))
+        # Tell API workers which cached tenders are now stale (sent on commit)
+        notify_tenders_changed(conn, tender_ids)
         conn.commit()
 
 if __name__ == "__main__":
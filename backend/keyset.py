@@ -0,0 +1,97 @@
+"""
+Keyset pagination for the MCP search tools.
+
+A page continues strictly after the (sort value, id) of the previous page's
+last row, so every page is an index range scan on (sort column, id) that
+stops after `limit` rows, however deep the caller goes, and rows inserted
+meanwhile never shift or repeat a page. NULL sort values cannot take part in
+a row comparison, so they are served as a second phase once the non-NULL
+values run out, ordered by id alone.
+
+Cursors are opaque tokens that remember the sort and a fingerprint of the
+filters, so a cursor is only accepted by the query that issued it.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+
+def _plain(value):
+    # JSON-safe form of a sort value; restored by the sort's type on decode
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+_RESTORE = {
+    "text": str,
+    "integer": int,
+    "numeric": Decimal,
+    "timestamp": datetime.fromisoformat,
+}
+
+
+def fingerprint(filters):
+    raw = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(sort_by, descending, filters, value, row_id):
+    raw = json.dumps([sort_by, descending, fingerprint(filters), _plain(value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token, sort_by, descending, filters, value_type):
+    """(value, id) after which the next page starts; ValueError if it belongs to another query."""
+    try:
+        cur_sort, cur_desc, cur_filters, value, row_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if (cur_sort, cur_desc, cur_filters) != (sort_by, descending, fingerprint(filters)):
+        raise ValueError("cursor was issued for a different sort or different filters")
+    return (None if value is None else _RESTORE[value_type](value)), int(row_id)
+
+
+def page_queries(columns, source, conditions, sort_expr, tiebreak, descending, after=None):
+    """
+    The queries of one page, to run in order until `limit` rows are collected
+    (each takes %(limit)s, plus %(after_value)s / %(after_id)s when after is set).
+    Rows carry sort_value and sort_id for the next cursor.
+    """
+    direction = "DESC" if descending else "ASC"
+    where = list(conditions)
+    queries = []
+
+    if after is None or after[0] is not None:
+        keyset = list(where)
+        if after is not None:
+            op = "<" if descending else ">"
+            keyset.append(f"({sort_expr}, {tiebreak}) {op} (%(after_value)s, %(after_id)s)")
+        queries.append(f"""
+            SELECT {columns}, {sort_expr} AS sort_value, {tiebreak} AS sort_id
+            FROM {source}
+            WHERE {" AND ".join(keyset + [f"{sort_expr} IS NOT NULL"])}
+            ORDER BY {sort_expr} {direction}, {tiebreak} {direction}
+            LIMIT %(limit)s
+        """)
+
+    nulls = where + [f"{sort_expr} IS NULL"]
+    if after is not None and after[0] is None:
+        nulls.append(f"{tiebreak} > %(after_id)s")
+    queries.append(f"""
+        SELECT {columns}, NULL AS sort_value, {tiebreak} AS sort_id
+        FROM {source}
+        WHERE {" AND ".join(nulls)}
+        ORDER BY {tiebreak}
+        LIMIT %(limit)s
+    """)
+    return queries
+
+
+def count_query(source, conditions):
+    return f"SELECT COUNT(*) AS total FROM {source} WHERE {' AND '.join(conditions) or 'true'}"
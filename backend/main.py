@@ -1,9 +1,26 @@
 import os
-from fastapi import FastAPI, Depends, Query
-from sqlalchemy import create_engine, Column, Integer, String, JSON, text
+import json
+import analytics
+from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi.responses import Response
+from sqlalchemy import create_engine, Column, Integer, String, Numeric, JSON, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.dialects.postgresql import JSONB
+from notifications import TenderChangeListener
+from subresources import (
+    SUBRESOURCE_DDL, TENDER_SUBRESOURCES, CONTRACT_SUBRESOURCES, list_subresources, shallow_document
+)
+from tender_cache import TenderCache
+from summary_index import SummaryIndex
+from aliases import ALIAS_DDL, RESOLVE_ALIAS_SQL
+from bloom import KnownTenderIds
+from concurrency import SingleFlight, AdmissionLimiter, Overloaded
+import warmup
+from partitioning import YEAR_DDL, year_source, ensure_existing_partitions
+from summaries import SUMMARY_DDL, backfill_summaries
+import suggest
+import similarity
 
 app = FastAPI(title="Portland OCDS API", version="3.0.0")
 
@@ -13,6 +30,51 @@ engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Detail cache (per worker), invalidated by importer NOTIFYs
+TENDER_CACHE_BYTES = int(os.getenv("TENDER_CACHE_BYTES", str(64 * 1024 * 1024)))
+tender_cache = TenderCache(TENDER_CACHE_BYTES)
+change_listener = TenderChangeListener(DATABASE_URL)
+change_listener.subscribe(tender_cache.invalidate)
+
+# Negative cache: identifiers the Bloom filter rejects are answered without a query
+known_tender_ids = KnownTenderIds(engine)
+change_listener.subscribe(known_tender_ids.on_change)
+
+# Heavy aggregate endpoints: identical concurrent requests share one query,
+# and each endpoint runs a bounded number of queries at a time
+ENDPOINT_CONCURRENCY = int(os.getenv("ENDPOINT_CONCURRENCY", "4"))
+ENDPOINT_QUEUE = int(os.getenv("ENDPOINT_QUEUE", "32"))
+ENDPOINT_QUEUE_TIMEOUT = float(os.getenv("ENDPOINT_QUEUE_TIMEOUT", "10"))
+single_flight = SingleFlight()
+limiters = {
+    name: AdmissionLimiter(name, ENDPOINT_CONCURRENCY, ENDPOINT_QUEUE, ENDPOINT_QUEUE_TIMEOUT)
+    for name in ("stats", "statuses", "contracts")
+}
+
+def coalesced(endpoint, key, compute):
+    try:
+        return single_flight.do((endpoint,) + key, lambda: _admitted(endpoint, compute))
+    except Overloaded:
+        raise HTTPException(status_code=503, detail=f"{endpoint} is busy, retry shortly",
+                            headers={"Retry-After": "1"})
+
+def _admitted(endpoint, compute):
+    with limiters[endpoint].admit():
+        return compute()
+
+# Optional in-memory list index (SUMMARY_INDEX=1), rebuilt after imports
+summary_index = SummaryIndex(engine) if os.getenv("SUMMARY_INDEX", "0") == "1" else None
+if summary_index:
+    change_listener.subscribe(summary_index.mark_stale)
+
+# Typeahead prefix index over titles, ids, BIDNBR numbers and suppliers
+suggest_index = suggest.SuggestIndex(engine)
+change_listener.subscribe(suggest_index.mark_stale)
+
+# "More like this" TF-IDF index over tender texts (tender_vectors)
+similarity_index = similarity.SimilarityIndex(engine)
+change_listener.subscribe(similarity_index.mark_stale)
+
 # Model
 class Tender(Base):
     __tablename__ = "tenders"
@@ -21,6 +83,26 @@ class Tender(Base):
     tender_id = Column(String, unique=True, index=True)
     title = Column(String)
     data = Column(JSONB)  # The full OCDS JSON object
+    complexity = Column(Integer, nullable=False, default=0, server_default="0")
+    complexity_breakdown = Column(JSONB)  # Per-component counts, computed by the importer
+    release_year = Column(Integer, nullable=False, default=0, server_default="0")  # Partition key, 0 = undated
+
+class TenderSummary(Base):
+    """Narrow hot copy of a tender for lists and aggregates (see summaries.py)."""
+    __tablename__ = "tender_summaries"
+
+    id = Column(Integer, nullable=False)  # tenders.id
+    tender_id = Column(String, primary_key=True)
+    release_year = Column(Integer, primary_key=True)
+    title = Column(String)
+    status = Column(String)
+    amount = Column(Numeric)
+    date_modified = Column(String)
+    start_date = Column(String)
+    end_date = Column(String)
+    complexity = Column(Integer)
+    complexity_breakdown = Column(JSONB)
+    summary = Column(JSONB)  # List-card subset of the OCDS document
 
 # Dependency
 def get_db():
@@ -32,12 +114,67 @@ def get_db():
 
 @app.on_event("startup")
 def startup():
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    # Create tables if they don't exist (tender_summaries comes from SUMMARY_DDL)
+    Base.metadata.create_all(bind=engine, tables=[Tender.__table__])
     # Create GIN index for JSONB search if not exists
     with engine.connect() as conn:
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_data ON tenders USING gin (data);"))
+        # Columns added after the initial schema (create_all does not alter existing tables)
+        conn.execute(text("ALTER TABLE tenders ADD COLUMN IF NOT EXISTS complexity INTEGER NOT NULL DEFAULT 0;"))
+        conn.execute(text("ALTER TABLE tenders ADD COLUMN IF NOT EXISTS complexity_breakdown JSONB;"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_tenders_complexity ON tenders (complexity, id);"))
+        for ddl in SUBRESOURCE_DDL + ALIAS_DDL + SUMMARY_DDL + similarity.VECTOR_DDL + YEAR_DDL:
+            conn.execute(text(ddl))
+        # Databases imported before the hot/cold split
+        ensure_existing_partitions(conn)
+        backfill_summaries(conn)
         conn.commit()
+    change_listener.start()
+    known_tender_ids.start()
+    if summary_index:
+        summary_index.start()
+    suggest_index.start()
+    similarity_index.start()
+    warmup_report.update(warmup.warm_up(engine, warmup_fetch))
+
+# Last startup warm-up, reported by /tenders/meta/load
+warmup_report = {}
+
+def warmup_fetch(path, params, timeout):
+    # Call the endpoints in-process so this worker's caches are the ones filled
+    db = SessionLocal()
+    try:
+        # SET LOCAL ends with the session's transaction, so pooled connections stay clean
+        db.execute(text(f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}"))
+        if path == "/tenders/stats":
+            get_stats(db=db)
+        elif path == "/tenders/meta/statuses":
+            get_status_counts(db=db)
+        elif path == "/tenders":
+            get_tenders(**{"search": None, "status": None, "min_value": None, "active_at": None, **params}, db=db)
+        elif path == "/contracts":
+            get_contracts(**params, db=db)
+        else:
+            get_tender_by_id(path.rsplit("/", 1)[1], db=db)
+        return 200
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown():
+    change_listener.stop()
+    known_tender_ids.stop()
+    if summary_index:
+        summary_index.stop()
+    suggest_index.stop()
+    similarity_index.stop()
+
+def with_complexity(summary):
+    # List items are the list-card subset of the document (GET /tenders/{id} has
+    # the full one) plus the importer's per-component complexity breakdown
+    if summary.complexity_breakdown is None:
+        return summary.summary
+    return {**summary.summary, "complexity": summary.complexity_breakdown}
 
 @app.get("/tenders")
 def get_tenders(
@@ -50,73 +187,88 @@ def get_tenders(
     has_date: str = None,
     sort_by: str = "dateModified",
     descending: bool = True,
+    year: int = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Tender)
+    # Filter and sort in memory when the summary index is up; text search and
+    # release-year filters (pruned to one partition) stay in SQL
+    if summary_index and summary_index.ready and not search and year is None:
+        total, ids = summary_index.query(status, min_value, active_at, has_date, sort_by, descending, offset, limit)
+        rows = {t.id: t for t in db.query(TenderSummary).filter(TenderSummary.id.in_(ids)).all()} if ids else {}
+        return {
+            "data": [with_complexity(rows[i]) for i in ids if i in rows],
+            "meta": {
+                "total": total,
+                "limit": limit,
+                "offset": offset
+            }
+        }
+
+    # Filters and sorts read the narrow summary table, never the documents
+    query = db.query(TenderSummary)
+
+    # Release year (partition key when partitioned by year)
+    if year is not None:
+        query = query.filter(TenderSummary.release_year == year)
 
     # Search (Simple ILIKE on title or ID)
     if search:
         search_term = f"%{search}%"
         query = query.filter(
-            (Tender.title.ilike(search_term)) | 
-            (Tender.tender_id.ilike(search_term))
+            (TenderSummary.title.ilike(search_term)) | 
+            (TenderSummary.tender_id.ilike(search_term))
         )
 
     # Status Filter
     if status and status != "all":
-        # Status is stored in data->'tender'->>'status'
-        query = query.filter(text("data->'tender'->>'status' = :status")).params(status=status)
+        query = query.filter(TenderSummary.status == status)
 
     # Min Value Filter
     if min_value is not None:
-        query = query.filter(text("(data->'tender'->'value'->>'amount')::numeric > :min_val")).params(min_val=min_value)
+        query = query.filter(TenderSummary.amount > min_value)
 
     # Active At Filter
     if active_at:
-        query = query.filter(text("(data->'tender'->'tenderPeriod'->>'startDate')::timestamp <= :active_at::timestamp AND (data->'tender'->'tenderPeriod'->>'endDate')::timestamp >= :active_at::timestamp")).params(active_at=active_at)
+        query = query.filter(text("start_date::timestamp <= CAST(:active_at AS timestamp) AND end_date::timestamp >= CAST(:active_at AS timestamp)")).params(active_at=active_at)
 
     # Has Date Filter (Tender Date Present)
     if has_date:
         if has_date == "yes":
-            query = query.filter(text("data->'tender'->'tenderPeriod'->>'startDate' IS NOT NULL"))
+            query = query.filter(TenderSummary.start_date.isnot(None))
         elif has_date == "no":
-             query = query.filter(text("data->'tender'->'tenderPeriod'->>'startDate' IS NULL"))
+             query = query.filter(TenderSummary.start_date.is_(None))
 
     # Sorting
     if sort_by == "value":
-        sort_field = "(data->'tender'->'value'->>'amount')::numeric"
+        sort_field = "amount"
     elif sort_by == "dateModified":
-         sort_field = "data->>'date'"
+         sort_field = "date_modified"
     elif sort_by == "title":
-        # Case-insensitive sort, fallback to JSON if column empty
-        sort_field = "lower(COALESCE(title, data->'tender'->>'title'))"
+        # Case-insensitive sort (title falls back to the document title at import)
+        sort_field = "lower(title)"
     elif sort_by == "startDate":
-        sort_field = "data->'tender'->'tenderPeriod'->>'startDate'"
+        sort_field = "start_date"
     elif sort_by == "endDate":
-        sort_field = "data->'tender'->'tenderPeriod'->>'endDate'"
+        sort_field = "end_date"
     elif sort_by == "complexity":
-        # Sort by sum of details (Awards + Contracts + Documents + Items + Milestones + Bids)
-        # Using jsonb_array_length with COALESCE to handle nulls (defaults to empty array '[]')
-        sort_field = """(
-            jsonb_array_length(COALESCE(data->'tender'->'awards', '[]'::jsonb)) +
-            jsonb_array_length(COALESCE(data->'contracts', '[]'::jsonb)) +
-            jsonb_array_length(COALESCE(data->'tender'->'documents', '[]'::jsonb)) +
-            jsonb_array_length(COALESCE(data->'tender'->'items', '[]'::jsonb)) +
-            jsonb_array_length(COALESCE(data->'tender'->'milestones', '[]'::jsonb)) +
-            jsonb_array_length(COALESCE(data->'bids', '[]'::jsonb))
-        )"""
+        # Precomputed by the importer (see import_data.compute_complexity);
+        # id breaks ties so the (complexity, id) index serves the ordering
+        sort_field = "complexity"
     else:
-        sort_field = "data->>'date'"
+        sort_field = "date_modified"
 
     direction = "DESC" if descending else "ASC"
-    query = query.order_by(text(f"{sort_field} {direction}"))
+    if sort_field == "complexity":
+        query = query.order_by(text(f"complexity {direction}, id {direction}"))
+    else:
+        query = query.order_by(text(f"{sort_field} {direction}"))
 
     total = query.count()
     tenders = query.offset(offset).limit(limit).all()
 
     # Wrap in OCDS-like response structure for compatibility
     return {
-        "data": [t.data for t in tenders],
+        "data": [with_complexity(t) for t in tenders],
         "meta": {
             "total": total,
             "limit": limit,
@@ -126,9 +278,11 @@ def get_tenders(
 
 @app.get("/tenders/meta/statuses")
 def get_status_counts(db: Session = Depends(get_db)):
-    # Group by status
-    # using data->'tender'->>'status'
-    sql = text("SELECT data->'tender'->>'status' as status, COUNT(*) as count FROM tenders GROUP BY 1 ORDER BY 2 DESC")
+    return coalesced("statuses", (), lambda: query_status_counts(db))
+
+def query_status_counts(db):
+    # Group by status (summary column copied from data->'tender'->>'status')
+    sql = text("SELECT status, COUNT(*) as count FROM tender_summaries GROUP BY 1 ORDER BY 2 DESC")
     result = db.execute(sql).fetchall()
     
     stats = {}
@@ -142,51 +296,40 @@ def get_status_counts(db: Session = Depends(get_db)):
     return stats
 
 @app.get("/tenders/stats")
-def get_stats(db: Session = Depends(get_db)):
+def get_stats(year: int = None, db: Session = Depends(get_db)):
     """
     Get aggregate statistics across all tenders including:
     - Counts: tenders, contracts, items, milestones, transactions, purchase orders
     - Total award value
     - Date range (min/max dates)
+
+    Served from the Parquet analytics snapshot when one has been exported;
+    `year` restricts everything to tenders released that year.
     """
-    stats_sql = text("""
+    return coalesced("stats", (year,), lambda: query_stats(db, year))
+
+def query_stats(db, year=None):
+    if year is None and analytics.snapshot_available():
+        return analytics.overview()
+
+    # Per-tender counts are precomputed in tender_summaries (see summaries.py)
+    stats_sql = text(f"""
         SELECT
-            -- Tender count
-            COUNT(DISTINCT t.id) as tender_count,
-            -- Contract count
-            (SELECT COUNT(*) FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'contracts', '[]'::jsonb)) c) as contract_count,
-            -- Items count (from all contracts)
-            (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'items', '[]'::jsonb))), 0) 
-             FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'contracts', '[]'::jsonb)) c) as item_count,
-            -- Milestones count (from all contracts)
-            (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'milestones', '[]'::jsonb))), 0) 
-             FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'contracts', '[]'::jsonb)) c) as milestone_count,
-            -- Transactions count (from all contracts)
-            (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'implementation'->'transactions', '[]'::jsonb))), 0) 
-             FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'contracts', '[]'::jsonb)) c) as transaction_count,
-            -- Purchase orders count (from all contracts)
-            (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'implementation'->'purchaseOrders', '[]'::jsonb))), 0) 
-             FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'contracts', '[]'::jsonb)) c) as purchase_order_count,
-            -- Total award value (awards have value.amount structure)
-            (SELECT COALESCE(SUM((a.value->'value'->>'amount')::numeric), 0)
-             FROM tenders t2, jsonb_array_elements(COALESCE(t2.data->'awards', '[]'::jsonb)) a
-             WHERE a.value->'value'->>'amount' IS NOT NULL) as total_award_value,
-            -- Min date (earliest tender start date or contract date)
-            (SELECT MIN(LEAST(
-                NULLIF(t2.data->'tender'->'tenderPeriod'->>'startDate', '')::timestamp,
-                NULLIF(t2.data->>'date', '')::timestamp
-            ))
-             FROM tenders t2) as min_date,
-            -- Max date (latest tender end date, modification date, or contract date)
-            (SELECT MAX(GREATEST(
-                COALESCE(NULLIF(t2.data->'tender'->'tenderPeriod'->>'endDate', '')::timestamp, '1900-01-01'::timestamp),
-                COALESCE(NULLIF(t2.data->>'date', '')::timestamp, '1900-01-01'::timestamp)
-            ))
-             FROM tenders t2) as max_date
-        FROM tenders t
+            COUNT(*) as tender_count,
+            SUM(contract_count) as contract_count,
+            SUM(contract_item_count) as item_count,
+            SUM(contract_milestone_count) as milestone_count,
+            SUM(transaction_count) as transaction_count,
+            SUM(purchase_order_count) as purchase_order_count,
+            SUM(award_value) as total_award_value,
+            -- Earliest tender start date or release date
+            MIN(min_date) as min_date,
+            -- Latest tender end date or release date
+            MAX(max_date) as max_date
+        FROM {year_source("tender_summaries", year)} s
     """)
     
-    result = db.execute(stats_sql).fetchone()
+    result = db.execute(stats_sql, {"year": year}).fetchone()
     
     return {
         "tenders": result[0] or 0,
@@ -200,20 +343,133 @@ def get_stats(db: Session = Depends(get_db)):
         "maxDate": result[8].isoformat() if result[8] else None
     }
 
+@app.get("/tenders/meta/load")
+def get_load_stats():
+    return {
+        "singleFlight": {"executed": single_flight.executed, "shared": single_flight.shared},
+        "endpoints": {name: limiter.stats() for name, limiter in limiters.items()},
+        "warmup": warmup_report
+    }
+
+@app.get("/analytics/rollup")
+def get_rollup(entity: str = "contracts", by: str = "year", limit: int = 100):
+    """
+    Count/sum/avg/min/max of tender, award, contract or transaction amounts
+    grouped by year, month, status or party, from the analytics snapshot.
+    """
+    if not analytics.snapshot_available():
+        raise HTTPException(status_code=503, detail="Analytics snapshot not available")
+    try:
+        return analytics.rollup(entity, by, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/tenders/meta/cache")
+def get_cache_stats():
+    stats = tender_cache.stats()
+    stats["knownIds"] = known_tender_ids.stats()
+    if summary_index:
+        stats["summaryIndex"] = summary_index.stats()
+    stats["suggestIndex"] = suggest_index.stats()
+    stats["similarityIndex"] = similarity_index.stats()
+    return stats
+
+@app.get("/suggest")
+def get_suggestions(q: str, limit: int = 10, kinds: str = None, rank_by: str = "value"):
+    """
+    Typeahead over tender titles, tender ids, BIDNBR numbers and supplier names.
+    kinds is a comma-separated subset of title,tenderId,bidNumber,supplier;
+    rank_by is value (tender value, or total award value for suppliers) or tenders.
+    """
+    kind_list = [k for k in (kinds or "").split(",") if k]
+    if any(k not in suggest.KINDS for k in kind_list) or rank_by not in suggest.RANK_BY:
+        raise HTTPException(status_code=400, detail=f"kinds must be in {suggest.KINDS}, rank_by in {suggest.RANK_BY}")
+    if not suggest_index.ready:
+        return {"data": [], "meta": {"ready": False}}
+    data = suggest_index.suggest(q, max(1, min(limit, suggest.MAX_LIMIT)), kind_list, rank_by)
+    return {"data": data, "meta": {"ready": True}}
+
+@app.get("/similar")
+def get_similar(tender_id: str = None, q: str = None, limit: int = 10, db: Session = Depends(get_db)):
+    """
+    Tenders most similar to a tender (any of its identifiers) or to free text,
+    by TF-IDF cosine similarity of titles, descriptions and item descriptions.
+    """
+    if bool(tender_id) == bool(q):
+        raise HTTPException(status_code=400, detail="pass exactly one of tender_id or q")
+    if not similarity_index.ready:
+        return {"data": [], "meta": {"ready": False}}
+    limit = max(1, min(limit, similarity.MAX_LIMIT))
+    if tender_id:
+        resolved = db.execute(text("SELECT tender_id FROM tender_aliases WHERE alias = :tid"),
+                              {"tid": tender_id}).scalar() or tender_id
+        hits = similarity_index.similar_to(resolved, limit)
+        if hits is None:
+            raise HTTPException(status_code=404, detail=f"Tender '{tender_id}' is not indexed")
+    else:
+        hits = similarity_index.search(q, limit)
+
+    rows = db.execute(text("""
+        SELECT tender_id, title, status, amount FROM tender_summaries WHERE tender_id = ANY(:ids)
+    """), {"ids": [hit["tenderId"] for hit in hits]}).fetchall()
+    summaries = {row.tender_id: row for row in rows}
+    data = []
+    for hit in hits:
+        row = summaries.get(hit["tenderId"])
+        data.append({
+            **hit,
+            "title": row.title if row else None,
+            "status": row.status if row else None,
+            "value": float(row.amount) if row and row.amount is not None else None,
+        })
+    return {"data": data, "meta": {"ready": True}}
+
 @app.get("/tenders/{tender_id}")
-def get_tender_by_id(tender_id: str, db: Session = Depends(get_db)):
-    # Search by OCDS tenderID (which is stored in tender_id column)
+def get_tender_by_id(tender_id: str, shallow: bool = False, db: Session = Depends(get_db)):
+    # shallow=true replaces deep arrays with their lengths; page them via the sub-resource endpoints
+    cache_key = f"{tender_id}?shallow" if shallow else tender_id
+    cached = tender_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    if not known_tender_ids.might_exist(tender_id):
+        return {"data": None, "error": "Not Found"}
+
+    # Taken before the read, so a change notified while we query is not cached over
+    generation = tender_cache.generation()
+    # Resolve ocid / release id / BIDNBR through the alias index
     # Note: frontend sends OCDS ID e.g. "ocds-ptecst-123"
-    tender = db.query(Tender).filter(Tender.tender_id == tender_id).first()
-    
+    tender = db.query(Tender).filter(text(RESOLVE_ALIAS_SQL)).params(tid=tender_id).first()
+
     if not tender:
-        # Fallback: try to search by internal ID (OCDS 'id' field in data)
-        tender = db.query(Tender).filter(text("data->>'id' = :tid")).params(tid=tender_id).first()
+        # Tenders imported before tender_aliases existed: direct tender_id match
+        tender = db.query(Tender).filter(Tender.tender_id == tender_id).first()
 
     if not tender:
         return {"data": None, "error": "Not Found"}
 
-    return {"data": tender.data}
+    data = shallow_document(tender.data) if shallow else tender.data
+    payload = json.dumps({"data": data}).encode("utf-8")
+    tender_cache.put(cache_key, tender.tender_id, payload, generation)
+    return Response(content=payload, media_type="application/json")
+
+@app.get("/tenders/{tender_id}/{kind}")
+def get_tender_subresource(
+    tender_id: str,
+    kind: str,
+    limit: int = 50,
+    cursor: str = None,
+    sort_by: str = "position",
+    descending: bool = False,
+    db: Session = Depends(get_db)
+):
+    # Pages of documents / items / milestones / awards / contracts, served from tender_subresources
+    if kind not in TENDER_SUBRESOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown tender sub-resource '{kind}'")
+    try:
+        return list_subresources(db, "tender", tender_id, kind, limit, cursor, sort_by, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/contracts")
 def get_contracts(
@@ -221,19 +477,24 @@ def get_contracts(
     offset: int = 0,
     sort_by: str = "dateSigned",
     descending: bool = True,
+    year: int = None,
     db: Session = Depends(get_db)
 ):
+    return coalesced("contracts", (limit, offset, sort_by, descending, year),
+                     lambda: query_contracts(db, limit, offset, sort_by, descending, year))
+
+def query_contracts(db, limit, offset, sort_by, descending, year=None):
     # Flatten contracts from all tenders
     # We select the contract object and the parent tenderID for context
     
-    # Base selection
-    base_query = """
+    # Base selection (limited to one release year's partition when year is given)
+    base_query = f"""
         SELECT 
             c.value as contract,
             t.data->>'id' as ocds_id,
             t.data->'tender'->>'title' as tender_title
         FROM 
-            tenders t,
+            {year_source("tenders", year)} t,
             jsonb_array_elements(COALESCE(t.data->'contracts', '[]'::jsonb)) c
     """
 
@@ -255,11 +516,11 @@ def get_contracts(
     # Final Query
     sql = f"{base_query} {order_clause} {limit_clause}"
     
-    result = db.execute(text(sql)).fetchall()
+    result = db.execute(text(sql), {"year": year}).fetchall()
     
     # Count Query (Expensive query, maybe estimate or cache later? For now direct count)
-    count_sql = "SELECT count(*) FROM tenders t, jsonb_array_elements(COALESCE(t.data->'contracts', '[]'::jsonb)) c"
-    total = db.execute(text(count_sql)).scalar()
+    count_sql = f"SELECT count(*) FROM {year_source('tenders', year)} t, jsonb_array_elements(COALESCE(t.data->'contracts', '[]'::jsonb)) c"
+    total = db.execute(text(count_sql), {"year": year}).scalar()
 
     contracts = []
     for row in result:
@@ -285,7 +546,20 @@ def get_contracts(
     }
 
 @app.get("/contracts/{contract_id}")
-def get_contract(contract_id: str, db: Session = Depends(get_db)):
+def get_contract(contract_id: str, shallow: bool = False, db: Session = Depends(get_db)):
+    # Indexed lookup in the flattened contracts; fall back to scanning documents
+    # for tenders imported before tender_subresources existed
+    sql = """
+        SELECT s.data as contract, s.tender_id, t.title as tender_title
+        FROM tender_subresources s
+        LEFT JOIN tenders t ON t.tender_id = s.tender_id
+        WHERE s.kind = 'contracts' AND s.item_id = :contract_id AND s.parent_type = 'tender'
+        LIMIT 1
+    """
+    result = db.execute(text(sql), {"contract_id": contract_id}).fetchone()
+    if result:
+        return contract_response(result, shallow)
+
     sql = """
         SELECT 
             c.value as contract,
@@ -303,14 +577,35 @@ def get_contract(contract_id: str, db: Session = Depends(get_db)):
     
     if not result:
         raise HTTPException(status_code=404, detail="Contract not found")
-        
-    contract = result[0]
+
+    return contract_response(result, shallow)
+
+def contract_response(row, shallow=False):
+    contract = shallow_document(row[0]) if shallow else row[0]
     return {
         "contract": contract,
-        "tender_id": result[1],
-        "tender_title": result[2]
+        "tender_id": row[1],
+        "tender_title": row[2]
     }
 
+@app.get("/contracts/{contract_id}/{kind}")
+def get_contract_subresource(
+    contract_id: str,
+    kind: str,
+    limit: int = 50,
+    cursor: str = None,
+    sort_by: str = "position",
+    descending: bool = False,
+    db: Session = Depends(get_db)
+):
+    # Pages of transactions / milestones / purchaseOrders / documents / items
+    if kind not in CONTRACT_SUBRESOURCES:
+        raise HTTPException(status_code=404, detail=f"Unknown contract sub-resource '{kind}'")
+    try:
+        return list_subresources(db, "contract", contract_id, kind, limit, cursor, sort_by, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
@@ -0,0 +1,142 @@
+"""
+Tender change notifications over Postgres LISTEN/NOTIFY.
+
+The importer publishes the tender_ids it wrote on TENDER_CHANGES_CHANNEL and
+every API worker runs a TenderChangeListener that fans them out to in-process
+consumers (caches, indexes) so they can invalidate precisely what changed.
+"""
+
+import json
+import logging
+import select
+import threading
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+TENDER_CHANGES_CHANNEL = "tender_changes"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+# Payload meaning "everything may have changed" (full reload, missed messages)
+ALL_TENDERS = "*"
+
+
+def _chunk_ids(tender_ids):
+    chunk, size = [], 2
+    for tid in tender_ids:
+        entry = len(json.dumps(tid)) + 1
+        if chunk and size + entry > MAX_PAYLOAD_BYTES:
+            yield chunk
+            chunk, size = [], 2
+        chunk.append(tid)
+        size += entry
+    if chunk:
+        yield chunk
+
+
+def notify_tenders_changed(conn, tender_ids=None):
+    """
+    Queue a change notification on a SQLAlchemy connection.
+
+    Notifications are delivered when the surrounding transaction commits, so
+    call this in the same transaction as the writes. Passing no ids signals
+    that every tender may have changed.
+    """
+    if tender_ids is None:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                     {"channel": TENDER_CHANGES_CHANNEL, "payload": ALL_TENDERS})
+        return
+    for chunk in _chunk_ids([t for t in tender_ids if t]):
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                     {"channel": TENDER_CHANGES_CHANNEL, "payload": json.dumps(chunk, separators=(",", ":"))})
+
+
+def parse_payload(payload):
+    """Return the list of changed tender_ids, or None for 'all tenders'."""
+    if payload == ALL_TENDERS:
+        return None
+    try:
+        ids = json.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed tender change payload: %r", payload[:200])
+        return None
+    return [str(i) for i in ids] if isinstance(ids, list) else None
+
+
+class TenderChangeListener:
+    """
+    Background thread that LISTENs for tender changes and calls subscribers.
+
+    Each subscriber is called with a list of tender_ids, or with None when
+    everything must be treated as stale (e.g. after a reconnect, when
+    notifications may have been missed).
+    """
+
+    def __init__(self, database_url, channel=TENDER_CHANGES_CHANNEL, poll_interval=5.0):
+        # psycopg2 wants a plain libpq URL, not SQLAlchemy's postgresql+driver:// form
+        self.database_url = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        return callback
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tender-change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+
+    def _dispatch(self, tender_ids):
+        for callback in self._subscribers:
+            try:
+                callback(tender_ids)
+            except Exception:
+                logger.exception("Tender change subscriber %r failed", callback)
+
+    def _run(self):
+        first_connect = True
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(self.database_url)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.channel};")
+                logger.info("Listening for tender changes on '%s'", self.channel)
+
+                # Anything could have changed while we were disconnected
+                if not first_connect:
+                    self._dispatch(None)
+                first_connect = False
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        note = conn.notifies.pop(0)
+                        self._dispatch(parse_payload(note.payload))
+            except Exception as e:
+                logger.warning("Tender change listener error: %s", e)
+                self._stop.wait(self.poll_interval)
+            finally:
+                if conn is not None:
+                    conn.close()
+
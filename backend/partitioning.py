@@ -0,0 +1,213 @@
+"""
+Optional declarative partitioning of tenders, tender_subresources and
+tender_summaries by the year of the release date (PARTITION_BY_YEAR=1 for
+the importer).
+
+All three tables carry a release_year column in every mode; year 0 means the
+release has no usable date. When partitioned, each year is its own
+partition (tenders_y2019, tender_summaries_y2019, ...) with its own GIN
+and b-tree indexes, so vacuum and index maintenance only touch the years
+being re-imported, and old years can be frozen, clustered, compressed or
+detached one partition at a time. Queries that filter on release_year
+(the `year` parameter of /tenders, /tenders/stats and /contracts) are pruned
+to a single partition.
+
+The importer creates the partitioned tables on a fresh database, or migrates
+existing ones, when PARTITION_BY_YEAR=1. Maintenance of old years:
+`python partitioning.py status | freeze YEAR | detach YEAR`.
+"""
+
+import os
+import sys
+
+from sqlalchemy import text
+
+from summaries import SUMMARY_COLUMNS
+
+PARTITION_BY_YEAR = os.getenv("PARTITION_BY_YEAR", "0") == "1"
+
+UNDATED = 0
+
+PARTITIONED_DDL = {
+    "tenders": """
+        CREATE TABLE IF NOT EXISTS tenders (
+            id SERIAL,
+            tender_id VARCHAR NOT NULL,
+            title VARCHAR,
+            data JSONB,
+            complexity INTEGER NOT NULL DEFAULT 0,
+            complexity_breakdown JSONB,
+            release_year SMALLINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (id, release_year),
+            UNIQUE (tender_id, release_year)
+        ) PARTITION BY RANGE (release_year);
+    """,
+    "tender_subresources": """
+        CREATE TABLE IF NOT EXISTS tender_subresources (
+            id BIGSERIAL,
+            tender_id VARCHAR NOT NULL,
+            parent_type VARCHAR NOT NULL,
+            parent_id VARCHAR NOT NULL,
+            kind VARCHAR NOT NULL,
+            position INTEGER NOT NULL,
+            item_id VARCHAR,
+            item_date TIMESTAMP,
+            amount NUMERIC,
+            title VARCHAR,
+            party_name VARCHAR,
+            data JSONB,
+            release_year SMALLINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (id, release_year)
+        ) PARTITION BY RANGE (release_year);
+    """,
+    "tender_summaries": f"CREATE TABLE IF NOT EXISTS tender_summaries ({SUMMARY_COLUMNS}) PARTITION BY RANGE (release_year);",
+}
+
+# Columns and backfill shared by both modes
+YEAR_DDL = [
+    "ALTER TABLE tenders ADD COLUMN IF NOT EXISTS release_year SMALLINT NOT NULL DEFAULT 0;",
+    "ALTER TABLE tender_subresources ADD COLUMN IF NOT EXISTS release_year SMALLINT NOT NULL DEFAULT 0;",
+    "CREATE INDEX IF NOT EXISTS idx_tenders_release_year ON tenders (release_year);",
+]
+
+_BACKFILL_SQL = [
+    """
+    UPDATE tenders SET release_year = substr(data->>'date', 1, 4)::smallint
+    WHERE release_year = 0 AND data->>'date' ~ '^[0-9]{4}'
+    """,
+    """
+    UPDATE tender_subresources s SET release_year = t.release_year
+    FROM tenders t
+    WHERE s.tender_id = t.tender_id AND s.release_year <> t.release_year
+    """,
+]
+
+
+def release_year(tender_data):
+    """Partition key of a tender document: the year of its release date, or 0."""
+    date = tender_data.get('date')
+    if isinstance(date, str) and len(date) >= 4 and date[:4].isdigit():
+        return int(date[:4])
+    return UNDATED
+
+
+def partition_name(table, year):
+    return f"{table}_undated" if year == UNDATED else f"{table}_y{year}"
+
+
+def is_partitioned(conn, table="tenders"):
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+    ), {"table": table}).scalar())
+
+
+def ensure_partitions(conn, years, tables=tuple(PARTITIONED_DDL)):
+    """Create the year partitions rows are about to be routed to."""
+    for table in tables:
+        for year in sorted(set(years)):
+            bounds = "FROM (MINVALUE) TO (1)" if year == UNDATED else f"FROM ({int(year)}) TO ({int(year) + 1})"
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, year)} "
+                f"PARTITION OF {table} FOR VALUES {bounds}"
+            ))
+
+
+def ensure_existing_partitions(conn):
+    """Partitions for every year already in tenders, in the partitioned tables."""
+    tables = [table for table in PARTITIONED_DDL if is_partitioned(conn, table)]
+    if tables:
+        years = [row[0] for row in conn.execute(text("SELECT DISTINCT release_year FROM tenders"))]
+        ensure_partitions(conn, years + [UNDATED], tables=tables)
+
+
+def create_partitioned_tables(conn):
+    """Fresh databases only: CREATE TABLE IF NOT EXISTS leaves existing tables alone."""
+    for table, ddl in PARTITIONED_DDL.items():
+        conn.execute(text(ddl))
+        if is_partitioned(conn, table):
+            ensure_partitions(conn, [UNDATED], tables=(table,))
+
+
+def backfill_release_years(conn):
+    for sql in _BACKFILL_SQL:
+        conn.execute(text(sql))
+
+
+def migrate(conn, table):
+    """
+    Rebuild an unpartitioned table as a partitioned one, keeping ids.
+    The caller recreates the secondary indexes afterwards.
+    """
+    if is_partitioned(conn, table):
+        return False
+    old = f"{table}_unpartitioned"
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    # Free the index and sequence names for the new table
+    for (index,) in conn.execute(text(
+        "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = to_regclass(:old)"
+    ), {"old": old}).fetchall():
+        conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index[:50]}_unpartitioned"'))
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:old, 'id')"), {"old": old}).scalar()
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {table}_unpartitioned_id_seq"))
+
+    conn.execute(text(PARTITIONED_DDL[table]))
+    years = [row[0] for row in conn.execute(text(f"SELECT DISTINCT release_year FROM {old}"))]
+    ensure_partitions(conn, years + [UNDATED], tables=(table,))
+
+    columns = ", ".join(row[0] for row in conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_name = :table AND column_name IN
+            (SELECT column_name FROM information_schema.columns WHERE table_name = :old)
+    """), {"table": table, "old": old}))
+    conn.execute(text(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}"))
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+    ))
+    conn.execute(text(f"DROP TABLE {old}"))
+    return True
+
+
+def list_partitions(conn):
+    return conn.execute(text("""
+        SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid),
+               pg_total_relation_size(child.oid)
+        FROM pg_inherits i
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        JOIN pg_class child ON child.oid = i.inhrelid
+        WHERE parent.relname IN ('tenders', 'tender_subresources', 'tender_summaries')
+        ORDER BY 1, 2
+    """)).fetchall()
+
+
+def year_source(table, year):
+    """FROM-clause source limited to one release year, so the planner prunes partitions."""
+    if year is None:
+        return table
+    return f"(SELECT * FROM {table} WHERE release_year = :year)"
+
+
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+
+    engine = create_engine(os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/tenders_db"))
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+
+    if command == "status":
+        with engine.connect() as conn:
+            for parent, child, bounds, size in list_partitions(conn):
+                print(f"{parent:22} {child:36} {bounds:45} {size / 1024 / 1024:10.1f} MB")
+    elif command in ("freeze", "detach") and len(sys.argv) > 2:
+        year = int(sys.argv[2])
+        # VACUUM and DETACH ... CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in PARTITIONED_DDL:
+                partition = partition_name(table, year)
+                if command == "freeze":
+                    conn.execute(text(f"VACUUM (FREEZE, ANALYZE) {partition}"))
+                else:
+                    conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition} CONCURRENTLY"))
+                print(f"{command}: {partition}")
+    else:
+        print("usage: partitioning.py status | freeze YEAR | detach YEAR")
+        sys.exit(1)
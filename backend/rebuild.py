@@ -0,0 +1,48 @@
+"""
+Background rebuild loop shared by the in-process indexes.
+
+Change notifications arrive in bursts (one per imported batch), so rebuilds
+are coalesced: mark_stale() only flags the index, and a daemon thread rebuilds
+at most once per min_interval seconds.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRebuilder:
+    def __init__(self, name, build, min_interval=5.0):
+        self.name = name
+        self.build = build
+        self.min_interval = min_interval
+        self._stale = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the first build in the background, then rebuild whenever marked stale."""
+        self._stale.set()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._stale.set()
+
+    def mark_stale(self, tender_ids=None):
+        # Usable directly as a TenderChangeListener subscriber
+        self._stale.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._stale.wait()
+            if self._stop.is_set():
+                return
+            self._stale.clear()
+            try:
+                self.build()
+            except Exception:
+                logger.exception("%s rebuild failed", self.name)
+            self._stop.wait(self.min_interval)
@@ -5,26 +5,60 @@ ASGI application for serving the MCP server over Streamable HTTP.
 Run with: uvicorn serve_mcp:app --port 8082
 
 Includes OAuth 2.1 discovery endpoints for Claude Online compatibility.
+
+With MCP_STATELESS_HTTP=1 the transport keeps no session state in the
+process: every request is handled on its own, so the app can run as several
+uvicorn workers or replicas behind a plain load balancer, with no sticky
+sessions:
+    MCP_STATELESS_HTTP=1 uvicorn serve_mcp:app --port 8082 --workers 4
 """
 
 import json
+import os
 import uuid
 from contextlib import asynccontextmanager
 from starlette.applications import Starlette
 from starlette.routing import Route, Mount
-from starlette.responses import JSONResponse
-from mcp_server import mcp
+from starlette.responses import JSONResponse, PlainTextResponse
+from mcp_server import mcp, metrics, pool
 
 # Server metadata
 SERVER_NAME = "Portland OCDS MCP"
 SERVER_URL = "https://portland-ocds.wegov.nyc"  # Update with actual deployment URL
 
+# All tools are plain request/response calls (no server-initiated messages,
+# no subscriptions), so nothing is lost by not keeping sessions.
+mcp.settings.stateless_http = os.getenv("MCP_STATELESS_HTTP", "0") == "1"
+# Reply with one JSON body instead of an SSE stream, which buffering proxies handle better
+mcp.settings.json_response = os.getenv("MCP_JSON_RESPONSE", "0") == "1"
+WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
 
 @asynccontextmanager
 async def lifespan(app):
     """Manage MCP session lifecycle for Streamable HTTP transport."""
-    async with mcp.session_manager.run():
-        yield
+    await pool.open()
+    try:
+        async with mcp.session_manager.run():
+            yield
+    finally:
+        await pool.close()
+
+
+async def status(request):
+    """Connection pool metrics."""
+    return JSONResponse({"pool": pool.stats()})
+
+
+async def metrics_endpoint(request):
+    """Per-tool call metrics; ?format=prometheus for the text exposition format."""
+    if request.query_params.get("format") == "prometheus":
+        return PlainTextResponse(metrics.prometheus(pool.stats()), media_type="text/plain; version=0.0.4")
+    return JSONResponse({
+        "tools": metrics.stats(),
+        "pool": pool.stats(),
+        "slowCalls": list(metrics.slow_calls),
+    })
 
 
 # OAuth 2.1 Discovery Endpoints (required for Claude Online)
@@ -98,6 +132,8 @@ app = Starlette(
         Route("/register", endpoint=oauth_register, methods=["POST"]),
         Route("/authorize", endpoint=oauth_authorize, methods=["GET"]),
         Route("/token", endpoint=oauth_token, methods=["POST"]),
+        Route("/status", endpoint=status),
+        Route("/metrics", endpoint=metrics_endpoint),
         # Mount MCP Streamable HTTP app
         Mount("/mcp", app=mcp.streamable_http_app()),
     ],
@@ -107,4 +143,7 @@ app = Starlette(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8082)
+    if WORKERS > 1 and not mcp.settings.stateless_http:
+        raise SystemExit("MCP_WORKERS > 1 needs MCP_STATELESS_HTTP=1: sessions live in one worker's memory")
+    # Workers are separate processes, each with its own pool, so uvicorn needs the import string
+    uvicorn.run("serve_mcp:app" if WORKERS > 1 else app, host="0.0.0.0", port=8082, workers=WORKERS)
@@ -0,0 +1,291 @@
+"""
+Offline similarity index over tender texts ("more like this").
+
+The importer turns each tender's title, description and item descriptions
+into hashed n-gram counts (word unigrams and bigrams plus character 4-grams,
+so "paving" still meets "pave") and stores them compactly in tender_vectors,
+two small arrays per tender. Hashing needs no vocabulary, so vectors are
+computed one tender at a time during import.
+
+The index loads those counts into NumPy arrays, weights them by TF-IDF over
+the current corpus, L2-normalizes each tender, and keeps an inverted list per
+feature. A query (another tender, or free text) only touches the postings of
+its strongest features and scores every tender with one bincount, so the top
+K come back in milliseconds with no external service. The API rebuilds the
+index in the background after importer change notifications; the MCP server
+loads its own copy through its pool.
+"""
+
+import itertools
+import logging
+import re
+import time
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from rebuild import BackgroundRebuilder
+
+try:
+    import numpy as np
+except ImportError:  # similarity index disabled
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the features change; older vectors are recomputed by backfill_vectors
+VECTOR_VERSION = 1
+FEATURE_BITS = 20
+MAX_FEATURES = 1000
+MAX_QUERY_FEATURES = 64
+MAX_LIMIT = 50
+TITLE_WEIGHT = 2
+
+VECTOR_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tender_vectors (
+        tender_id VARCHAR PRIMARY KEY,
+        features INTEGER[] NOT NULL,
+        counts SMALLINT[] NOT NULL,
+        vector_version SMALLINT NOT NULL DEFAULT 0
+    );
+    """,
+]
+
+_WORD = re.compile(r"[a-z0-9]+(?:['&.-][a-z0-9]+)*")
+# Header lines the importer writes into every description (import_data.map_tender_clean)
+_BOILERPLATE = re.compile(r"^(?:Publisher|Version): .*$", re.MULTILINE)
+_STOPWORDS = frozenset("a an and are as at be by for from in into is it of on or the to with".split())
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode("utf-8")) & ((1 << FEATURE_BITS) - 1)
+
+
+def texts(tender_data):
+    """(title, other text) of a tender document, or of its `tender` object."""
+    tender = tender_data.get("tender", tender_data) if isinstance(tender_data, dict) else {}
+    title = tender.get("title") or ""
+    parts = [_BOILERPLATE.sub("", tender.get("description") or "")]
+    for item in tender.get("items") or []:
+        description = (item or {}).get("description")
+        # Items without a description default to the title; do not count it twice
+        if description and description != title:
+            parts.append(description)
+    return title, "\n".join(parts)
+
+
+def _add_features(counts, value, weight=1):
+    words = [w for w in _WORD.findall(value.lower()) if w not in _STOPWORDS]
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        features += [f"c:{padded[i:i + 4]}" for i in range(max(1, len(padded) - 3))]
+    for feature in features:
+        key = _hash(feature)
+        counts[key] = counts.get(key, 0) + weight
+
+
+def vectorize(title, body=""):
+    """Hashed feature counts of a text as (features, counts), sorted by feature."""
+    counts = {}
+    _add_features(counts, title, TITLE_WEIGHT)
+    _add_features(counts, body)
+    if len(counts) > MAX_FEATURES:
+        # Keep the most frequent features of very long texts
+        counts = dict(sorted(counts.items(), key=lambda kv: -kv[1])[:MAX_FEATURES])
+    features = sorted(counts)
+    return features, [min(counts[f], 32767) for f in features]
+
+
+def extract_vector(tender_data):
+    """tender_vectors row of a mapped tender document."""
+    features, counts = vectorize(*texts(tender_data))
+    return {"tender_id": tender_data["id"], "features": features, "counts": counts, "version": VECTOR_VERSION}
+
+
+_INSERT = """
+    INSERT INTO tender_vectors (tender_id, features, counts, vector_version)
+    VALUES (:tender_id, :features, :counts, :version)
+"""
+
+
+def replace_vectors(conn, tender_ids, rows):
+    """Swap the vectors of the given tenders within the caller's transaction."""
+    conn.execute(text("DELETE FROM tender_vectors WHERE tender_id = ANY(:ids)"), {"ids": list(tender_ids)})
+    if rows:
+        conn.execute(text(_INSERT + " ON CONFLICT (tender_id) DO NOTHING"), rows)
+
+
+def backfill_vectors(conn, batch_size=1000):
+    """Vectorize tenders imported before tender_vectors (or its current version) existed."""
+    conn.execute(text("DELETE FROM tender_vectors WHERE vector_version < :version"), {"version": VECTOR_VERSION})
+    total = 0
+    while True:
+        rows = conn.execute(text("""
+            SELECT t.tender_id, t.data->'tender' AS tender
+            FROM tenders t
+            WHERE NOT EXISTS (SELECT 1 FROM tender_vectors v WHERE v.tender_id = t.tender_id)
+            LIMIT :limit
+        """), {"limit": batch_size}).fetchall()
+        if not rows:
+            return total
+        vectors = []
+        for tender_id, tender in rows:
+            features, counts = vectorize(*texts(tender or {}))
+            vectors.append({"tender_id": tender_id, "features": features, "counts": counts, "version": VECTOR_VERSION})
+        conn.execute(text(_INSERT + " ON CONFLICT (tender_id) DO NOTHING"), vectors)
+        total += len(vectors)
+        if len(rows) < batch_size:
+            return total
+
+
+LOAD_SQL = "SELECT tender_id, features, counts FROM tender_vectors"
+
+
+class _Vectors:
+    """Immutable TF-IDF index; replaced wholesale on rebuild."""
+
+    def __init__(self, rows):
+        self.tender_ids = [row[0] for row in rows]
+        self.positions = {tender_id: i for i, tender_id in enumerate(self.tender_ids)}
+        n = len(rows)
+        lengths = np.array([len(row[1]) for row in rows], dtype=np.int64)
+        features = np.fromiter(itertools.chain.from_iterable(row[1] for row in rows), dtype=np.int32,
+                               count=int(lengths.sum()))
+        counts = np.fromiter(itertools.chain.from_iterable(row[2] for row in rows), dtype=np.float32,
+                             count=len(features))
+        docs = np.repeat(np.arange(n, dtype=np.int32), lengths)
+
+        # Features are hashes below 2**FEATURE_BITS, so they index dense arrays directly.
+        # Smoothed IDF per feature; sublinear term frequency
+        self.df = np.bincount(features, minlength=1 << FEATURE_BITS)
+        self.idf = (np.log((1 + n) / (1 + self.df)) + 1).astype(np.float32)
+        weights = (1 + np.log(counts)) * self.idf[features]
+        norms = np.sqrt(np.bincount(docs, weights * weights, minlength=n)).astype(np.float32)
+        weights /= np.where(norms > 0, norms, 1)[docs]
+
+        # Per tender (rows of the matrix), to use a tender as the query
+        self.doc_ptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.doc_terms = features
+        self.doc_weights = weights.astype(np.float32)
+
+        # Per feature (inverted lists), to score every tender against a query
+        order = np.argsort(features, kind="stable")
+        self.post_docs = docs[order]
+        self.post_weights = self.doc_weights[order]
+        self.post_ptr = np.concatenate(([0], np.cumsum(self.df)))
+        self.feature_count = int(np.count_nonzero(self.df))
+
+    def query_vector(self, title, body=""):
+        features, counts = vectorize(title, body)
+        terms = np.array(features, dtype=np.int64)
+        known = self.df[terms] > 0
+        terms = terms[known]
+        weights = (1 + np.log(np.array(counts, dtype=np.float32)[known])) * self.idf[terms]
+        norm = np.sqrt((weights * weights).sum())
+        return terms, weights / norm if norm > 0 else weights
+
+    def tender_vector(self, position):
+        lo, hi = self.doc_ptr[position], self.doc_ptr[position + 1]
+        return self.doc_terms[lo:hi], self.doc_weights[lo:hi]
+
+    def search(self, terms, weights, limit, exclude=None):
+        """Top `limit` (position, cosine score) pairs for a normalized query vector."""
+        if len(terms) == 0:
+            return []
+        if len(terms) > MAX_QUERY_FEATURES:
+            # The strongest features carry the score; common ones would only add long postings
+            keep = np.argpartition(-weights, MAX_QUERY_FEATURES - 1)[:MAX_QUERY_FEATURES]
+            terms, weights = terms[keep], weights[keep]
+        starts, ends = self.post_ptr[terms], self.post_ptr[terms + 1]
+        spans = [np.arange(s, e) for s, e in zip(starts.tolist(), ends.tolist())]
+        postings = np.concatenate(spans)
+        contributions = self.post_weights[postings] * np.repeat(weights, ends - starts)
+        scores = np.bincount(self.post_docs[postings], contributions, minlength=len(self.tender_ids))
+        if exclude is not None:
+            scores[exclude] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(i), float(scores[i])) for i in candidates]
+
+
+class SimilarityIndex:
+    """
+    TF-IDF index over tender_vectors. The API builds it from its engine in the
+    background (start/mark_stale); other callers pass rows to load().
+    """
+
+    def __init__(self, engine=None, min_rebuild_interval=30.0):
+        self.engine = engine
+        self._vectors = None
+        self._rebuilder = BackgroundRebuilder("similarity-index", self.build, min_rebuild_interval)
+        self.built_at = None
+        self.build_seconds = None
+
+    @property
+    def ready(self):
+        return self._vectors is not None
+
+    def build(self):
+        with self.engine.connect() as conn:
+            # Databases imported before tender_vectors existed
+            added = backfill_vectors(conn)
+            conn.commit()
+            if added:
+                logger.info("Vectorized %d tenders", added)
+            rows = conn.execute(text(LOAD_SQL)).fetchall()
+        self.load(rows)
+
+    def load(self, rows):
+        started = time.monotonic()
+        self._vectors = _Vectors(rows)
+        self.built_at = time.time()
+        self.build_seconds = round(time.monotonic() - started, 3)
+        logger.info("Similarity index built: %d tenders, %d features in %.2fs",
+                    len(rows), self._vectors.feature_count, self.build_seconds)
+
+    def start(self):
+        if np is None:
+            logger.warning("NumPy not installed; similarity index disabled")
+            return
+        self._rebuilder.start()
+
+    def stop(self):
+        self._rebuilder.stop()
+
+    def mark_stale(self, tender_ids=None):
+        self._rebuilder.mark_stale(tender_ids)
+
+    def similar_to(self, tender_id, limit=10):
+        """Tenders most similar to an indexed tender, or None if it is not indexed."""
+        vectors = self._vectors
+        position = vectors.positions.get(tender_id)
+        if position is None:
+            return None
+        terms, weights = vectors.tender_vector(position)
+        return self._results(vectors, vectors.search(terms, weights, limit, exclude=position))
+
+    def search(self, query, limit=10):
+        """Tenders most similar to a free-text description."""
+        vectors = self._vectors
+        terms, weights = vectors.query_vector(query)
+        return self._results(vectors, vectors.search(terms, weights, limit))
+
+    @staticmethod
+    def _results(vectors, hits):
+        return [{"tenderId": vectors.tender_ids[i], "score": round(score, 4)} for i, score in hits]
+
+    def stats(self):
+        vectors = self._vectors
+        return {
+            "ready": self.ready,
+            "tenders": len(vectors.tender_ids) if vectors else 0,
+            "features": vectors.feature_count if vectors else 0,
+            "builtAt": datetime.fromtimestamp(self.built_at, timezone.utc).isoformat() if self.built_at else None,
+            "buildSeconds": self.build_seconds,
+        }
@@ -0,0 +1,232 @@
+"""
+Flattened storage for the large nested arrays of a tender document.
+
+Contracts can carry hundreds of implementation transactions and milestones.
+The importer copies each element of those arrays into tender_subresources,
+one row per element, so the API can page through them with an index instead
+of shipping (and decompressing) the whole document for every view.
+"""
+
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import text
+
+from partitioning import release_year
+
+SUBRESOURCE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS tender_subresources (
+        id BIGSERIAL PRIMARY KEY,
+        tender_id VARCHAR NOT NULL,
+        parent_type VARCHAR NOT NULL,
+        parent_id VARCHAR NOT NULL,
+        kind VARCHAR NOT NULL,
+        position INTEGER NOT NULL,
+        item_id VARCHAR,
+        item_date TIMESTAMP,
+        amount NUMERIC,
+        title VARCHAR,
+        party_name VARCHAR,
+        data JSONB
+    );
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_subres_tender ON tender_subresources (tender_id);",
+    "CREATE INDEX IF NOT EXISTS idx_subres_item ON tender_subresources (kind, item_id);",
+    """CREATE INDEX IF NOT EXISTS idx_subres_position
+       ON tender_subresources (parent_type, parent_id, kind, position);""",
+    """CREATE INDEX IF NOT EXISTS idx_subres_date
+       ON tender_subresources (parent_type, parent_id, kind, (COALESCE(item_date, '-infinity'::timestamp)), position);""",
+    """CREATE INDEX IF NOT EXISTS idx_subres_amount
+       ON tender_subresources (parent_type, parent_id, kind, (COALESCE(amount, 0)), position);""",
+    # Covers the award and contract scans of the MCP aggregate tool (aggregates.py)
+    """CREATE INDEX IF NOT EXISTS idx_subres_rollup
+       ON tender_subresources (kind, item_id) INCLUDE (tender_id, item_date, amount, party_name)
+       WHERE parent_type = 'tender' AND kind IN ('awards', 'contracts');""",
+    # Keyset pages of the MCP search_contracts tool
+    """CREATE INDEX IF NOT EXISTS idx_subres_contract_date
+       ON tender_subresources (item_date, id) WHERE parent_type = 'tender' AND kind = 'contracts';""",
+    """CREATE INDEX IF NOT EXISTS idx_subres_contract_amount
+       ON tender_subresources (amount, id) WHERE parent_type = 'tender' AND kind = 'contracts';""",
+]
+
+# Arrays that hang off the tender document, and off each contract in it
+TENDER_SUBRESOURCES = {
+    "documents": lambda d: (d.get('tender') or {}).get('documents'),
+    "items": lambda d: (d.get('tender') or {}).get('items'),
+    "milestones": lambda d: (d.get('tender') or {}).get('milestones'),
+    "awards": lambda d: d.get('awards'),
+    "contracts": lambda d: d.get('contracts'),
+}
+
+CONTRACT_SUBRESOURCES = {
+    "transactions": lambda c: (c.get('implementation') or {}).get('transactions'),
+    "milestones": lambda c: c.get('milestones'),
+    "purchaseOrders": lambda c: (c.get('implementation') or {}).get('purchaseOrders'),
+    "documents": lambda c: c.get('documents'),
+    "items": lambda c: c.get('items'),
+}
+
+# Arrays replaced by their length in ?shallow=true detail responses
+SHALLOW_ARRAYS = {"documents", "items", "milestones", "transactions", "purchaseOrders"}
+
+def _cursor_timestamp(value):
+    # item_date is COALESCEd to -infinity, which Postgres casts but Python cannot parse
+    return value if value in ("-infinity", "infinity") else datetime.fromisoformat(value)
+
+
+# sort_by -> Python parser of the cursor value, checked before it is bound
+CURSOR_VALUE_TYPES = {"position": int, "date": _cursor_timestamp, "value": Decimal}
+
+# sort_by -> (SQL sort expression, SQL cast applied to the cursor value)
+SORTS = {
+    "position": ("position", "CAST(:cursor_value AS INTEGER)"),
+    "date": ("COALESCE(item_date, '-infinity'::timestamp)", "CAST(:cursor_value AS TIMESTAMP)"),
+    "value": ("COALESCE(amount, 0)", "CAST(:cursor_value AS NUMERIC)"),
+}
+
+MAX_PAGE_SIZE = 500
+
+
+def _parse_date(value):
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _element_fields(element):
+    date = None
+    for key in ('date', 'dateSigned', 'datePublished', 'dueDate'):
+        date = _parse_date(element.get(key))
+        if date:
+            break
+
+    amount = (element.get('value') or {}).get('amount')
+    parties = element.get('suppliers') or []
+    party = (parties[0] if parties else None) or element.get('payee') or {}
+
+    return {
+        "item_id": str(element['id']) if element.get('id') is not None else None,
+        "item_date": date,
+        "amount": amount if isinstance(amount, (int, float)) else None,
+        "title": element.get('title') or element.get('description'),
+        "party_name": party.get('name') if isinstance(party, dict) else None,
+        "data": json.dumps(element),
+    }
+
+
+def extract_subresources(tender_data):
+    """Yield one row per element of every paginated array in the document."""
+    tender_id = tender_data.get('id')
+    year = release_year(tender_data)
+
+    def rows(parent_type, parent_id, kind, elements):
+        for position, element in enumerate(elements or []):
+            if isinstance(element, dict):
+                yield {"tender_id": tender_id, "parent_type": parent_type, "parent_id": parent_id,
+                       "kind": kind, "position": position, "release_year": year, **_element_fields(element)}
+
+    for kind, extract in TENDER_SUBRESOURCES.items():
+        yield from rows("tender", tender_id, kind, extract(tender_data))
+
+    for contract in tender_data.get('contracts') or []:
+        if not isinstance(contract, dict) or contract.get('id') is None:
+            continue
+        for kind, extract in CONTRACT_SUBRESOURCES.items():
+            yield from rows("contract", str(contract['id']), kind, extract(contract))
+
+
+def replace_subresources(conn, tender_ids, rows):
+    """Swap the flattened rows of the given tenders within the caller's transaction."""
+    conn.execute(text("DELETE FROM tender_subresources WHERE tender_id = ANY(:ids)"),
+                 {"ids": list(tender_ids)})
+    if rows:
+        conn.execute(text("""
+            INSERT INTO tender_subresources
+                (tender_id, parent_type, parent_id, kind, position, item_id, item_date, amount, title, party_name, data,
+                 release_year)
+            VALUES
+                (:tender_id, :parent_type, :parent_id, :kind, :position, :item_id, :item_date, :amount, :title, :party_name, :data,
+                 :release_year)
+        """), rows)
+
+
+def shallow_document(value):
+    """Copy of an OCDS document with the deep arrays replaced by their lengths."""
+    if isinstance(value, dict):
+        return {
+            k: len(v) if k in SHALLOW_ARRAYS and isinstance(v, list) else shallow_document(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [shallow_document(v) for v in value]
+    return value
+
+
+def encode_cursor(sort_value, position):
+    raw = json.dumps([sort_value, position])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_by="position"):
+    """(sort value, position) after which the next page starts; ValueError if malformed."""
+    try:
+        sort_value, position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value = CURSOR_VALUE_TYPES[sort_by](sort_value)
+        if isinstance(value, Decimal) and not value.is_finite():
+            raise ValueError(sort_value)
+        return value, int(position)
+    except (ValueError, TypeError, InvalidOperation):
+        raise ValueError("invalid cursor")
+
+
+def list_subresources(db, parent_type, parent_id, kind, limit=50, cursor=None,
+                      sort_by="position", descending=False):
+    """
+    Keyset-paginated page of one array, as {"data": [...], "meta": {...}}.
+    Raises ValueError for a cursor that was not issued by this endpoint.
+    """
+    if sort_by not in SORTS:
+        sort_by = "position"
+    sort_expr, cursor_cast = SORTS[sort_by]
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    direction = "DESC" if descending else "ASC"
+    params = {"parent_type": parent_type, "parent_id": parent_id, "kind": kind, "limit": limit}
+    after = decode_cursor(cursor, sort_by) if cursor else None
+
+    where = "parent_type = :parent_type AND parent_id = :parent_id AND kind = :kind"
+    total = db.execute(text(f"SELECT count(*) FROM tender_subresources WHERE {where}"), params).scalar()
+
+    if after is not None:
+        params["cursor_value"], params["cursor_position"] = after
+        op = "<" if descending else ">"
+        where += f" AND ({sort_expr}, position) {op} ({cursor_cast}, :cursor_position)"
+
+    rows = db.execute(text(f"""
+        SELECT data, ({sort_expr})::text AS sort_value, position
+        FROM tender_subresources
+        WHERE {where}
+        ORDER BY {sort_expr} {direction}, position {direction}
+        LIMIT :limit
+    """), params).fetchall()
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = encode_cursor(last[1], last[2])
+
+    return {
+        "data": [row[0] for row in rows],
+        "meta": {
+            "total": total,
+            "limit": limit,
+            "sort_by": sort_by,
+            "descending": descending,
+            "next_cursor": next_cursor
+        }
+    }
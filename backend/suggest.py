@@ -0,0 +1,175 @@
+"""
+In-memory prefix index behind the /suggest typeahead.
+
+Every suggestion (a tender title, tender id, BIDNBR number or supplier name)
+is reachable through one or more lowercase keys: the whole label, each word
+of titles and supplier names, and the numeric tail of ids. The keys live in
+one sorted list, so a prefix is two bisections, and the matches are ranked
+with NumPy over parallel score arrays. Built from tender_summaries and
+rebuilt in the background after importer change notifications.
+"""
+
+import bisect
+import logging
+import re
+import time
+
+from sqlalchemy import text
+
+from rebuild import BackgroundRebuilder
+
+try:
+    import numpy as np
+except ImportError:  # typeahead disabled
+    np = None
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("title", "tenderId", "bidNumber", "supplier")
+RANK_BY = ("value", "tenders")
+MAX_LIMIT = 50
+
+_BUILD_SQL = """
+    SELECT tender_id, title, COALESCE(amount, 0)::float8, award_value::float8, bid_numbers, suppliers
+    FROM tender_summaries
+"""
+
+_WORD = re.compile(r"[\w][\w&'.-]*")
+
+
+def normalize(value):
+    return " ".join(value.lower().split())
+
+
+def _keys(kind, label):
+    key = normalize(label)
+    keys = {key}
+    if kind in ("title", "supplier"):
+        # Every word start, so "main" finds "Water Main Repair"
+        keys.update(key[m.start():] for m in _WORD.finditer(key))
+    else:
+        # "133262" finds ocds-ptecst-133262
+        tail = re.search(r"\d+$", key)
+        if tail:
+            keys.add(tail.group())
+    return keys
+
+
+class _Entries:
+    """Immutable suggestion set; replaced wholesale on rebuild."""
+
+    def __init__(self, rows):
+        entries = {}
+
+        def add(kind, label, tender_id, value):
+            if not label:
+                return
+            # [label, tender to open, value, tender count, value of that tender]
+            entry = entries.setdefault((kind, normalize(label)), [label, tender_id, 0.0, 0, -1.0])
+            entry[3] += 1
+            # Suppliers rank by their total award value, the rest by the best tender
+            entry[2] = entry[2] + value if kind == "supplier" else max(entry[2], value)
+            if value > entry[4]:
+                entry[1], entry[4] = tender_id, value
+
+        for tender_id, title, amount, award_value, bid_numbers, suppliers in rows:
+            add("title", title, tender_id, amount)
+            add("tenderId", tender_id, tender_id, amount)
+            for bid_number in bid_numbers or []:
+                add("bidNumber", bid_number, tender_id, amount)
+            for supplier in suppliers or []:
+                add("supplier", supplier, tender_id, award_value)
+
+        items = list(entries.items())
+        self.labels = [entry[0] for _, entry in items]
+        self.tender_ids = [entry[1] for _, entry in items]
+        self.kinds = np.array([KINDS.index(kind) for (kind, _), _ in items], dtype=np.int8)
+        self.values = np.array([entry[2] for _, entry in items], dtype=np.float64)
+        self.tender_counts = np.array([entry[3] for _, entry in items], dtype=np.int32)
+
+        pairs = sorted((key, i) for i, ((kind, _), entry) in enumerate(items) for key in _keys(kind, entry[0]))
+        self.keys = [key for key, _ in pairs]
+        self.refs = np.array([i for _, i in pairs], dtype=np.int32)
+
+
+class SuggestIndex:
+    def __init__(self, engine, min_rebuild_interval=5.0):
+        self.engine = engine
+        self._entries = None
+        self._rebuilder = BackgroundRebuilder("suggest-index", self.build, min_rebuild_interval)
+        self.build_seconds = None
+
+    @property
+    def ready(self):
+        return self._entries is not None
+
+    def build(self):
+        started = time.monotonic()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(_BUILD_SQL)).fetchall()
+        self._entries = _Entries(rows)
+        self.build_seconds = round(time.monotonic() - started, 3)
+        logger.info("Suggest index built: %d suggestions, %d keys in %.2fs",
+                    len(self._entries.labels), len(self._entries.keys), self.build_seconds)
+
+    def start(self):
+        if np is None:
+            logger.warning("NumPy not installed; suggest index disabled")
+            return
+        self._rebuilder.start()
+
+    def stop(self):
+        self._rebuilder.stop()
+
+    def mark_stale(self, tender_ids=None):
+        self._rebuilder.mark_stale(tender_ids)
+
+    def suggest(self, prefix, limit=10, kinds=None, rank_by="value"):
+        """Top `limit` suggestions whose keys start with prefix, best first."""
+        entries = self._entries
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lo = bisect.bisect_left(entries.keys, prefix)
+        hi = bisect.bisect_left(entries.keys, prefix + "\uffff", lo)
+        refs = entries.refs[lo:hi]
+        if kinds:
+            refs = refs[np.isin(entries.kinds[refs], [KINDS.index(k) for k in kinds])]
+        if len(refs) == 0:
+            return []
+
+        primary, secondary = entries.values, entries.tender_counts
+        if rank_by == "tenders":
+            primary, secondary = secondary, primary
+        # An entry matched through several of its words appears more than once;
+        # the headroom keeps the deduplicated top `limit` exact in practice
+        scores = primary[refs]
+        keep = min(len(refs), limit * 8)
+        if keep < len(refs):
+            refs = refs[np.argpartition(-scores, keep - 1)[:keep]]
+        order = np.lexsort((-secondary[refs], -primary[refs]))
+
+        results, seen = [], set()
+        for i in refs[order].tolist():
+            if i in seen:
+                continue
+            seen.add(i)
+            results.append({
+                "label": entries.labels[i],
+                "kind": KINDS[entries.kinds[i]],
+                "tenderId": entries.tender_ids[i],
+                "value": float(entries.values[i]),
+                "tenders": int(entries.tender_counts[i]),
+            })
+            if len(results) == limit:
+                break
+        return results
+
+    def stats(self):
+        entries = self._entries
+        return {
+            "ready": self.ready,
+            "suggestions": len(entries.labels) if entries else 0,
+            "keys": len(entries.keys) if entries else 0,
+            "buildSeconds": self.build_seconds,
+        }
@@ -0,0 +1,208 @@
+"""
+Hot/cold split of tender storage.
+
+tenders keeps the full OCDS document and is read only by detail views, the
+contract endpoints and the analytics export. tender_summaries is a narrow
+copy of the fields the list, stats and MCP search need: filter and sort
+columns, per-tender counts for the aggregates, and a small list-card document
+(`summary`) shaped like the OCDS release, so reading it never decompresses
+a large document.
+
+Summaries are derived from tenders in SQL, so the expressions match the
+queries they replace exactly; the importer refreshes them for every batch.
+"""
+
+import logging
+import os
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# TOAST compression for the cold document column: lz4 (Postgres 14+ built
+# with lz4), pglz, or "default" to leave the column alone
+DOCUMENT_COMPRESSION = os.getenv("DOCUMENT_COMPRESSION", "lz4")
+
+# Bump when the summary gains a column: backfill_summaries re-derives older rows
+SUMMARY_VERSION = 1
+
+SUMMARY_COLUMNS = """
+    id INTEGER NOT NULL,
+    tender_id VARCHAR NOT NULL,
+    release_year SMALLINT NOT NULL DEFAULT 0,
+    title VARCHAR,
+    status VARCHAR,
+    amount NUMERIC,
+    currency VARCHAR,
+    procurement_method VARCHAR,
+    date_modified VARCHAR,
+    start_date VARCHAR,
+    end_date VARCHAR,
+    complexity INTEGER NOT NULL DEFAULT 0,
+    complexity_breakdown JSONB,
+    award_count INTEGER NOT NULL DEFAULT 0,
+    contract_count INTEGER NOT NULL DEFAULT 0,
+    contract_item_count INTEGER NOT NULL DEFAULT 0,
+    contract_milestone_count INTEGER NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    purchase_order_count INTEGER NOT NULL DEFAULT 0,
+    award_value NUMERIC NOT NULL DEFAULT 0,
+    min_date TIMESTAMP,
+    max_date TIMESTAMP,
+    bid_numbers VARCHAR[],
+    suppliers VARCHAR[],
+    summary JSONB,
+    summary_version SMALLINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tender_id, release_year)
+"""
+
+SUMMARY_TABLE_DDL = f"CREATE TABLE IF NOT EXISTS tender_summaries ({SUMMARY_COLUMNS});"
+
+SUMMARY_DDL = [
+    SUMMARY_TABLE_DDL,
+    # Columns added since the first release; existing rows are re-derived by backfill_summaries
+    "ALTER TABLE tender_summaries ADD COLUMN IF NOT EXISTS bid_numbers VARCHAR[];",
+    "ALTER TABLE tender_summaries ADD COLUMN IF NOT EXISTS suppliers VARCHAR[];",
+    "ALTER TABLE tender_summaries ADD COLUMN IF NOT EXISTS procurement_method VARCHAR;",
+    "ALTER TABLE tender_summaries ADD COLUMN IF NOT EXISTS summary_version SMALLINT NOT NULL DEFAULT 0;",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_id ON tender_summaries (id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_status ON tender_summaries (status);",
+    # (sort column, id): ORDER BY and keyset pages of the list and MCP search
+    "DROP INDEX IF EXISTS idx_summaries_date;",
+    "DROP INDEX IF EXISTS idx_summaries_start;",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_date_id ON tender_summaries (date_modified, id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_start_id ON tender_summaries (start_date, id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_end_id ON tender_summaries (end_date, id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_amount_id ON tender_summaries (amount, id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_complexity ON tender_summaries (complexity, id);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_release_year ON tender_summaries (release_year);",
+    "CREATE INDEX IF NOT EXISTS idx_summaries_method ON tender_summaries (procurement_method);",
+]
+
+_CONTRACTS = "jsonb_array_elements(COALESCE(t.data->'contracts', '[]'::jsonb)) c"
+
+# One summary row per tender, computed from the document
+_SUMMARY_SELECT = f"""
+    SELECT
+        t.id,
+        t.tender_id,
+        t.release_year,
+        COALESCE(t.title, t.data->'tender'->>'title'),
+        t.data->'tender'->>'status',
+        (t.data->'tender'->'value'->>'amount')::numeric,
+        t.data->'tender'->'value'->>'currency',
+        t.data->'tender'->>'procurementMethod',
+        t.data->>'date',
+        t.data->'tender'->'tenderPeriod'->>'startDate',
+        t.data->'tender'->'tenderPeriod'->>'endDate',
+        t.complexity,
+        t.complexity_breakdown,
+        jsonb_array_length(COALESCE(t.data->'awards', '[]'::jsonb)),
+        jsonb_array_length(COALESCE(t.data->'contracts', '[]'::jsonb)),
+        (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'items', '[]'::jsonb))), 0) FROM {_CONTRACTS}),
+        (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'milestones', '[]'::jsonb))), 0) FROM {_CONTRACTS}),
+        (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'implementation'->'transactions', '[]'::jsonb))), 0)
+         FROM {_CONTRACTS}),
+        (SELECT COALESCE(SUM(jsonb_array_length(COALESCE(c.value->'implementation'->'purchaseOrders', '[]'::jsonb))), 0)
+         FROM {_CONTRACTS}),
+        (SELECT COALESCE(SUM((a.value->'value'->>'amount')::numeric), 0)
+         FROM jsonb_array_elements(COALESCE(t.data->'awards', '[]'::jsonb)) a
+         WHERE a.value->'value'->>'amount' IS NOT NULL),
+        LEAST(
+            NULLIF(t.data->'tender'->'tenderPeriod'->>'startDate', '')::timestamp,
+            NULLIF(t.data->>'date', '')::timestamp
+        ),
+        GREATEST(
+            COALESCE(NULLIF(t.data->'tender'->'tenderPeriod'->>'endDate', '')::timestamp, '1900-01-01'::timestamp),
+            COALESCE(NULLIF(t.data->>'date', '')::timestamp, '1900-01-01'::timestamp)
+        ),
+        -- BIDNBR numbers are not kept in the document; the importer writes aliases first
+        ARRAY(
+            SELECT a.alias FROM tender_aliases a
+            WHERE a.tender_id = t.tender_id AND a.scheme = 'US_OR-PDX-BS-BIDNBR'
+            ORDER BY a.alias
+        ),
+        ARRAY(
+            SELECT DISTINCT s.value->>'name'
+            FROM jsonb_array_elements(COALESCE(t.data->'awards', '[]'::jsonb)) a,
+                 jsonb_array_elements(COALESCE(a.value->'suppliers', '[]'::jsonb)) s
+            WHERE s.value->>'name' IS NOT NULL
+        ),
+        -- List-card document: what the tender list renders, including the
+        -- contract milestone statuses and transaction amounts behind the payment badge
+        jsonb_strip_nulls(jsonb_build_object(
+            'id', t.data->'id',
+            'date', t.data->'date',
+            'tender', jsonb_build_object(
+                'title', t.data->'tender'->'title',
+                'tenderID', t.data->'tender'->'tenderID',
+                'status', t.data->'tender'->'status',
+                'value', t.data->'tender'->'value',
+                'tenderPeriod', t.data->'tender'->'tenderPeriod'
+            ),
+            'contracts', (
+                SELECT jsonb_agg(jsonb_build_object(
+                    'id', c.value->'id',
+                    'milestones', (
+                        SELECT jsonb_agg(jsonb_build_object('status', m.value->'status'))
+                        FROM jsonb_array_elements(COALESCE(c.value->'milestones', '[]'::jsonb)) m
+                    ),
+                    'implementation', jsonb_build_object('transactions', (
+                        SELECT jsonb_agg(jsonb_build_object('value', jsonb_build_object('amount', tx.value->'value'->'amount')))
+                        FROM jsonb_array_elements(COALESCE(c.value->'implementation'->'transactions', '[]'::jsonb)) tx
+                    ))
+                ) ORDER BY c.ordinality)
+                FROM jsonb_array_elements(COALESCE(t.data->'contracts', '[]'::jsonb)) WITH ORDINALITY c
+            )
+        )),
+        {SUMMARY_VERSION}
+    FROM tenders t
+"""
+
+_INSERT = """
+    INSERT INTO tender_summaries (
+        id, tender_id, release_year, title, status, amount, currency, procurement_method, date_modified,
+        start_date, end_date, complexity, complexity_breakdown, award_count, contract_count, contract_item_count,
+        contract_milestone_count, transaction_count, purchase_order_count, award_value, min_date, max_date,
+        bid_numbers, suppliers, summary, summary_version
+    )
+"""
+
+
+def refresh_summaries(conn, tender_ids):
+    """Rebuild the summaries of the given tenders within the caller's transaction."""
+    ids = list(tender_ids)
+    conn.execute(text("DELETE FROM tender_summaries WHERE tender_id = ANY(:ids)"), {"ids": ids})
+    conn.execute(text(f"{_INSERT} {_SUMMARY_SELECT} WHERE t.tender_id = ANY(:ids)"), {"ids": ids})
+
+
+def backfill_summaries(conn):
+    """Summarize tenders imported before tender_summaries (or its newest columns) existed."""
+    conn.execute(text("DELETE FROM tender_summaries WHERE summary_version < :version"),
+                 {"version": SUMMARY_VERSION})
+    return conn.execute(text(f"""
+        {_INSERT} {_SUMMARY_SELECT}
+        WHERE NOT EXISTS (SELECT 1 FROM tender_summaries s WHERE s.tender_id = t.tender_id)
+        ON CONFLICT DO NOTHING
+    """)).rowcount
+
+
+def set_document_compression(conn, method=DOCUMENT_COMPRESSION):
+    """
+    Set the TOAST compression of tenders.data on the table and every partition
+    (ALTER on a partitioned parent only affects partitions created later).
+    Applies to documents written from now on; returns False if unsupported.
+    """
+    if method == "default":
+        return True
+    tables = [row[0] for row in conn.execute(text(
+        "SELECT relid::regclass::text FROM pg_partition_tree('tenders')"
+    ))]
+    try:
+        with conn.begin_nested():
+            for table in tables:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN data SET COMPRESSION {method}"))
+    except Exception as e:
+        logger.warning("Document compression %s unavailable: %s", method, str(e).splitlines()[0])
+        return False
+    return True
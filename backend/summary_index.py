@@ -0,0 +1,153 @@
+"""
+Optional in-memory column index over the tender list.
+
+Holds one compact NumPy array per filterable/sortable field (status, amount,
+dates, title sort rank, complexity) so get_tenders can filter and order the whole
+list with vectorized operations and only ask Postgres for the summaries on
+the requested page. It is rebuilt in the background after importer change
+notifications; until the first build completes (or if NumPy is missing)
+`ready` is False and callers use their SQL path.
+"""
+
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from rebuild import BackgroundRebuilder
+
+try:
+    import numpy as np
+except ImportError:  # summary index disabled
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_BUILD_SQL = """
+    SELECT
+        id,
+        -- Rank under the database collation, so title order matches ORDER BY exactly
+        dense_rank() OVER (ORDER BY lower(title)) AS title_rank,
+        status,
+        amount::float8 AS amount,
+        EXTRACT(EPOCH FROM NULLIF(date_modified, '')::timestamp) AS date,
+        EXTRACT(EPOCH FROM NULLIF(start_date, '')::timestamp) AS start_date,
+        EXTRACT(EPOCH FROM NULLIF(end_date, '')::timestamp) AS end_date,
+        start_date IS NOT NULL AS has_start,
+        complexity
+    FROM tender_summaries
+"""
+
+
+def _epoch(value):
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # Postgres treats naive timestamps as UTC in EXTRACT(EPOCH ...)
+    return dt.replace(tzinfo=timezone.utc).timestamp() if dt.tzinfo is None else dt.timestamp()
+
+
+class _Columns:
+    """Immutable set of column arrays; replaced wholesale on rebuild."""
+
+    def __init__(self, rows):
+        floats = lambda i: np.array([np.nan if r[i] is None else float(r[i]) for r in rows], dtype=np.float64)
+        self.ids = np.array([r[0] for r in rows], dtype=np.int64)
+        self.title_rank = np.array([r[1] for r in rows], dtype=np.int32)
+        statuses = [r[2] or "" for r in rows]
+        self.status_names, status_codes = np.unique(np.array(statuses, dtype=np.str_), return_inverse=True)
+        self.status = status_codes.astype(np.int16)
+        self.amount = floats(3)
+        self.date = floats(4)
+        self.start_date = floats(5)
+        self.end_date = floats(6)
+        self.has_start = np.array([bool(r[7]) for r in rows], dtype=bool)
+        self.complexity = np.array([r[8] or 0 for r in rows], dtype=np.int32)
+
+
+class SummaryIndex:
+    def __init__(self, engine, min_rebuild_interval=5.0):
+        self.engine = engine
+        self._columns = None
+        self._rebuilder = BackgroundRebuilder("summary-index", self.build, min_rebuild_interval)
+        self.built_at = None
+        self.build_seconds = None
+
+    @property
+    def ready(self):
+        return self._columns is not None
+
+    def build(self):
+        started = time.monotonic()
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(_BUILD_SQL)).fetchall()
+        self._columns = _Columns(rows)
+        self.built_at = time.time()
+        self.build_seconds = round(time.monotonic() - started, 3)
+        logger.info("Summary index built: %d tenders in %.2fs", len(rows), self.build_seconds)
+
+    def start(self):
+        """Build in the background and keep rebuilding when marked stale."""
+        if np is None:
+            logger.warning("NumPy not installed; summary index disabled")
+            return
+        self._rebuilder.start()
+
+    def stop(self):
+        self._rebuilder.stop()
+
+    def mark_stale(self, tender_ids=None):
+        self._rebuilder.mark_stale(tender_ids)
+
+    def query(self, status=None, min_value=None, active_at=None, has_date=None,
+              sort_by="dateModified", descending=True, offset=0, limit=50):
+        """Return (total matches, tender row ids for the requested page in order)."""
+        cols = self._columns
+        mask = np.ones(len(cols.ids), dtype=bool)
+
+        if status and status != "all":
+            code = np.searchsorted(cols.status_names, status)
+            if code >= len(cols.status_names) or cols.status_names[code] != status:
+                return 0, []
+            mask &= cols.status == code
+        if min_value is not None:
+            with np.errstate(invalid="ignore"):
+                mask &= cols.amount > min_value
+        if active_at:
+            at = _epoch(active_at)
+            with np.errstate(invalid="ignore"):
+                mask &= (cols.start_date <= at) & (cols.end_date >= at)
+        if has_date == "yes":
+            mask &= cols.has_start
+        elif has_date == "no":
+            mask &= ~cols.has_start
+
+        selected = np.flatnonzero(mask)
+        total = len(selected)
+        if total == 0:
+            return 0, []
+
+        keys = {
+            "value": cols.amount,
+            "dateModified": cols.date,
+            "title": cols.title_rank,
+            "startDate": cols.start_date,
+            "endDate": cols.end_date,
+        }
+        if sort_by == "complexity":
+            order = np.lexsort((cols.ids[selected], cols.complexity[selected]))
+        else:
+            # Ascending puts NaN (SQL NULL) last; reversing gives Postgres' DESC NULLS FIRST
+            order = np.argsort(keys.get(sort_by, cols.date)[selected], kind="stable")
+        if descending:
+            order = order[::-1]
+
+        page = selected[order[offset:offset + limit]]
+        return total, cols.ids[page].tolist()
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "tenders": len(self._columns.ids) if self.ready else 0,
+            "builtAt": datetime.fromtimestamp(self.built_at, timezone.utc).isoformat() if self.built_at else None,
+            "buildSeconds": self.build_seconds,
+        }
@@ -0,0 +1,117 @@
+"""
+In-process LRU cache of serialized tender detail responses.
+
+The cache is bounded by the total size of the stored payloads rather than by
+entry count, because a single tender with hundreds of contract transactions
+can be larger than a thousand small ones. Entries are indexed by the tender_id
+they were built from so a change notification can drop exactly those entries,
+whatever key (ocid, alias, shallow view) they were requested under.
+
+A request can read a tender just before an import commits a change to it and
+store the result just after the change notification was handled, which would
+keep the old document cached indefinitely. To prevent that, callers take a
+generation() snapshot before querying and pass it to put(); the write is
+dropped if that tender (or the whole cache) was invalidated in between.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Past this many tenders, per-tender invalidation generations are folded into
+# one cache-wide one (puts in flight are then dropped; nothing stale is kept)
+MAX_TRACKED_INVALIDATIONS = 100_000
+
+
+class TenderCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (tender_id, payload bytes)
+        self._keys_by_tender = {}      # tender_id -> set of keys
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        self._generation = 0
+        self._cleared_at = 0          # generation of the last full clear
+        self._invalidated_at = {}     # tender_id -> generation of its last invalidation
+
+    def generation(self):
+        """Snapshot to take before reading a tender from the database; see put()."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, tender_id, payload, generation):
+        """Store payload unless tender_id was invalidated after `generation` was taken."""
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation < max(self._cleared_at, self._invalidated_at.get(tender_id, 0)):
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (tender_id, payload)
+            self._keys_by_tender.setdefault(tender_id, set()).add(key)
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tender_ids):
+        """Drop cached entries for the given tender_ids (None drops everything)."""
+        with self._lock:
+            self._generation += 1
+            if tender_ids is None or len(self._invalidated_at) + len(tender_ids) > MAX_TRACKED_INVALIDATIONS:
+                self._cleared_at = self._generation
+                self._invalidated_at.clear()
+            if tender_ids is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._keys_by_tender.clear()
+                self._size = 0
+                return
+            for tender_id in tender_ids:
+                if self._cleared_at != self._generation:
+                    self._invalidated_at[tender_id] = self._generation
+                for key in list(self._keys_by_tender.get(tender_id, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def _remove(self, key):
+        tender_id, payload = self._entries.pop(key)
+        self._size -= len(payload)
+        keys = self._keys_by_tender.get(tender_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tender[tender_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stalePutsDropped": self.stale_puts,
+            }
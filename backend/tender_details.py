@@ -0,0 +1,206 @@
+"""
+Size-bounded tender documents for the MCP get_tender_details tool.
+
+A caller can project the document onto sections (top-level keys or dotted
+paths such as `contracts.0.implementation`), which Postgres extracts with #>
+so only those parts leave the database. Whatever is returned is then fitted
+into a byte budget: every array is cut to the same number of leading items,
+the largest count that still fits, and each array that lost items is listed
+with a continuation token. Passing a token back returns the next slice of
+that array, sized in SQL from the elements' serialized lengths, so the whole
+record can be paged through in compact responses.
+
+The same projection and budget apply to batches of tenders or contracts
+fetched together by ID (batch_query), with the budget shared between them.
+"""
+
+import base64
+import json
+import re
+
+DEFAULT_MAX_BYTES = 60000
+MAX_BYTES = 1000000
+MAX_SECTIONS = 20
+MAX_BATCH = 50
+BATCH_KINDS = ("tenders", "contracts")
+
+_KEY = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+# Any known identifier (ocid, release id, BIDNBR) resolves via tender_aliases
+_RESOLVE = "COALESCE((SELECT tender_id FROM tender_aliases WHERE alias = %(tender_id)s), %(tender_id)s)"
+
+_SLICE_SQL = f"""
+    SELECT d.tender_id, jsonb_typeof(d.arr) AS type,
+        CASE WHEN jsonb_typeof(d.arr) = 'array' THEN jsonb_array_length(d.arr) END AS total,
+        (SELECT jsonb_agg(x.value ORDER BY x.ord)
+         FROM (
+             SELECT e.value, e.ord, SUM(octet_length(e.value::text)) OVER (ORDER BY e.ord) AS running
+             FROM jsonb_array_elements(CASE WHEN jsonb_typeof(d.arr) = 'array' THEN d.arr END)
+                  WITH ORDINALITY e(value, ord)
+             WHERE e.ord > %(offset)s
+         ) x
+         -- Always at least one element, however large
+         WHERE x.running <= %(budget)s OR x.ord = %(offset)s + 1) AS items
+    FROM (SELECT tender_id, data #> %(path)s AS arr FROM tenders WHERE tender_id = {_RESOLVE}) d
+"""
+
+
+def parse_path(path):
+    """'contracts.0.implementation' -> ['contracts', '0', 'implementation']."""
+    keys = path.split(".") if isinstance(path, str) else []
+    if not keys or not all(_KEY.match(key) for key in keys):
+        raise ValueError(f"invalid section path {path!r}; use dotted keys and array indexes like contracts.0.items")
+    return keys
+
+
+def clamp_budget(max_bytes):
+    return max(1000, min(int(max_bytes or DEFAULT_MAX_BYTES), MAX_BYTES))
+
+
+def _projection(sections, source="data"):
+    """Columns for the whole document (`data`) or one per section (`section_i`)."""
+    params = {}
+    if not sections:
+        return f"{source} AS data", params
+    if len(sections) > MAX_SECTIONS:
+        raise ValueError(f"request at most {MAX_SECTIONS} sections")
+    columns = []
+    for i, section in enumerate(sections):
+        params[f"section_{i}"] = parse_path(section)
+        columns.append(f"{source} #> %(section_{i})s AS section_{i}")
+    return ", ".join(columns), params
+
+
+def document_query(sections=None):
+    """SQL and parameters of the first request: the whole document or one column per section."""
+    columns, params = _projection(sections)
+    return f"SELECT tender_id, {columns} FROM tenders WHERE tender_id = {_RESOLVE}", params
+
+
+def batch_query(kind, ids, sections=None):
+    """
+    SQL and parameters fetching many tenders (by any alias) or contracts (by
+    contract id) in one query. Rows carry the requested id, the tender_id and,
+    for contracts, their position in the tender's contracts array.
+    """
+    if kind not in BATCH_KINDS:
+        raise ValueError(f"kind must be one of {list(BATCH_KINDS)}")
+    if len(ids) > MAX_BATCH:
+        raise ValueError(f"request at most {MAX_BATCH} ids per call")
+    if kind == "tenders":
+        columns, params = _projection(sections, "t.data")
+        sql = f"""
+            SELECT r.id AS requested, t.tender_id, NULL::int AS position, {columns}
+            FROM unnest(%(ids)s::text[]) AS r(id)
+            LEFT JOIN tender_aliases a ON a.alias = r.id
+            JOIN tenders t ON t.tender_id = COALESCE(a.tender_id, r.id)
+        """
+    else:
+        # One flattened row per contract (see subresources.py)
+        columns, params = _projection(sections, "s.data")
+        sql = f"""
+            SELECT s.item_id AS requested, s.tender_id, s.position, {columns}
+            FROM tender_subresources s
+            WHERE s.parent_type = 'tender' AND s.kind = 'contracts' AND s.item_id = ANY(%(ids)s::text[])
+            ORDER BY s.tender_id, s.position
+        """
+    return sql, {**params, "ids": list(ids)}
+
+
+def slice_query(tender_id, path, offset, budget):
+    return _SLICE_SQL, {"tender_id": tender_id, "path": path, "offset": offset, "budget": budget}
+
+
+def encode_continuation(tender_id, path, offset):
+    raw = json.dumps([tender_id, path, offset], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_continuation(token):
+    try:
+        tender_id, path, offset = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return str(tender_id), [str(key) for key in path], int(offset)
+    except (ValueError, TypeError):
+        raise ValueError("invalid continuation token")
+
+
+def _size(value):
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+
+def _cut(value, limit, path, cuts, keep=False):
+    """
+    Copy of value with every array cut to `limit` leading items (except value
+    itself when keep is set); the cut arrays are appended to cuts.
+    """
+    if isinstance(value, dict):
+        return {k: _cut(v, limit, path + [k], cuts) for k, v in value.items()}
+    if isinstance(value, list):
+        if not keep and len(value) > limit:
+            cuts.append((path, len(value)))
+            value = value[:limit]
+        return [_cut(v, limit, path + [str(i)], cuts) for i, v in enumerate(value)]
+    return value
+
+
+def _longest_array(value):
+    if isinstance(value, dict):
+        return max((_longest_array(v) for v in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value)] + [_longest_array(v) for v in value])
+    return 0
+
+
+def share_budget(values, budget):
+    """
+    Split budget between values: the smallest take what they need and
+    whatever they leave over goes to the larger ones. Returns one budget per value.
+    """
+    budgets = [0] * len(values)
+    order = sorted(range(len(values)), key=lambda i: _size(values[i]))
+    remaining = budget
+    for n, i in enumerate(order):
+        share = remaining // (len(order) - n)
+        budgets[i] = share
+        remaining -= min(share, _size(values[i]))
+    return budgets
+
+
+def fit(value, budget, tender_id, path=(), offset=None):
+    """
+    Fit value into `budget` bytes by cutting arrays; returns (value, truncated).
+
+    `path` is where value sits in the document; keys of value may themselves
+    be dotted section paths (OCDS keys never contain dots). When value is a slice of an
+    array starting at index `offset`, the slice itself is kept whole (its
+    length was already chosen to fit) and only the arrays inside its items
+    are cut, with tokens pointing at their absolute positions.
+    """
+    path = list(path)
+    keep = offset is not None
+    if _size(value) <= budget:
+        return value, []
+
+    # Largest uniform item limit that fits (the size only grows with the limit)
+    lo, hi = 0, _longest_array(value)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _size(_cut(value, mid, [], [], keep)) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+
+    cuts = []
+    value = _cut(value, lo, [], cuts, keep)
+    truncated = []
+    for relative, total in cuts:
+        if keep:
+            relative = [str(int(relative[0]) + offset)] + relative[1:]
+        absolute = path + [key for part in relative for key in part.split(".")]
+        truncated.append({
+            "path": ".".join(absolute),
+            "returned": lo,
+            "total": total,
+            "continuation": encode_continuation(tender_id, absolute, lo),
+        })
+    return value, truncated
@@ -0,0 +1,235 @@
+"""
+Per-tool instrumentation for the MCP server.
+
+Every tool wrapped with ToolMetrics.instrument records, per call, the wall
+time, the time spent in database queries, the number of queries, the rows
+they returned and scanned, and the size of the JSON response. The pools
+report each query into the current call through a context variable (see
+db_pool.py); rows scanned are read from the transaction's own statistics
+(pg_stat_xact_user_tables), so they cost one extra catalog query
+and can be switched off with MCP_COUNT_SCANNED_ROWS=0.
+
+Totals and recent latency percentiles per tool are served by serve_mcp.py at
+/metrics, and every call is logged as one JSON line on the `mcp.calls`
+logger. Calls slower than MCP_SLOW_CALL_MS are sampled (MCP_SLOW_SAMPLE_RATE)
+with their SQL and its EXPLAIN (MCP_SLOW_EXPLAIN=plan, analyze or off); the
+plans are taken in the background, after the response has been sent.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+
+SLOW_CALL_MS = float(os.getenv("MCP_SLOW_CALL_MS", "1000"))
+SLOW_SAMPLE_RATE = float(os.getenv("MCP_SLOW_SAMPLE_RATE", "1.0"))
+SLOW_EXPLAIN = os.getenv("MCP_SLOW_EXPLAIN", "plan")  # plan | analyze | off
+SLOW_SAMPLES = int(os.getenv("MCP_SLOW_SAMPLES", "20"))
+COUNT_SCANNED_ROWS = os.getenv("MCP_COUNT_SCANNED_ROWS", "1") == "1"
+CALL_LOG = os.getenv("MCP_CALL_LOG", "1") == "1"
+
+LATENCY_WINDOW = 500
+MAX_SAMPLED_QUERIES = 5
+
+call_log = logging.getLogger("mcp.calls")
+if CALL_LOG and not call_log.handlers:
+    # stderr, never stdout: the stdio transport speaks the protocol there
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    call_log.addHandler(_handler)
+    call_log.setLevel(logging.INFO)
+    call_log.propagate = False
+
+_current = contextvars.ContextVar("mcp_call", default=None)
+
+
+def current():
+    """Stats of the tool call running in this context, or None."""
+    return _current.get()
+
+
+class CallStats:
+    __slots__ = ("tool", "count_scanned", "db_seconds", "queries", "rows", "scanned", "statements")
+
+    def __init__(self, tool, count_scanned=COUNT_SCANNED_ROWS):
+        self.tool = tool
+        self.count_scanned = count_scanned
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.rows = 0
+        self.scanned = 0
+        self.statements = []
+
+    def record(self, sql, params, rows, seconds, scanned=None):
+        self.queries += 1
+        self.rows += rows
+        self.db_seconds += seconds
+        self.scanned += scanned or 0
+        if len(self.statements) < MAX_SAMPLED_QUERIES:
+            self.statements.append((sql, params, seconds, rows))
+
+
+class _ToolTotals:
+    __slots__ = ("calls", "errors", "error_results", "wall", "max_wall", "db", "queries", "rows",
+                 "scanned", "bytes", "max_bytes", "slow", "recent")
+
+    def __init__(self):
+        self.calls = self.errors = self.error_results = self.queries = self.rows = 0
+        self.scanned = self.bytes = self.max_bytes = self.slow = 0
+        self.wall = self.max_wall = self.db = 0.0
+        self.recent = deque(maxlen=LATENCY_WINDOW)
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ToolMetrics:
+    def __init__(self, explain=None):
+        # explain(sql, params, analyze) -> plan text; see mcp_server.py
+        self.explain = explain
+        self._tools = {}
+        self._lock = threading.Lock()
+        self.slow_calls = deque(maxlen=SLOW_SAMPLES)
+        self._background = set()
+
+    def instrument(self, fn):
+        """Wrap an async tool; the wrapper keeps its signature for FastMCP's schema."""
+        tool = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            stats = CallStats(tool)
+            token = _current.set(stats)
+            started = time.monotonic()
+            result = error = None
+            try:
+                result = await fn(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                _current.reset(token)
+                wall = time.monotonic() - started
+                size = len(json.dumps(result, default=str)) if result is not None else 0
+                self._finish(stats, wall, size, result, error, kwargs)
+
+        return wrapper
+
+    def _finish(self, stats, wall, size, result, error, arguments):
+        error_result = isinstance(result, dict) and "error" in result
+        slow = wall * 1000 >= SLOW_CALL_MS
+        with self._lock:
+            totals = self._tools.setdefault(stats.tool, _ToolTotals())
+            totals.calls += 1
+            totals.errors += error is not None
+            totals.error_results += error_result
+            totals.wall += wall
+            totals.max_wall = max(totals.max_wall, wall)
+            totals.db += stats.db_seconds
+            totals.queries += stats.queries
+            totals.rows += stats.rows
+            totals.scanned += stats.scanned
+            totals.bytes += size
+            totals.max_bytes = max(totals.max_bytes, size)
+            totals.slow += slow
+            totals.recent.append(wall)
+
+        event = {
+            "event": "mcp_tool_call",
+            "tool": stats.tool,
+            "wallMs": round(wall * 1000, 2),
+            "dbMs": round(stats.db_seconds * 1000, 2),
+            "queries": stats.queries,
+            "rows": stats.rows,
+            "rowsScanned": stats.scanned if stats.count_scanned else None,
+            "bytes": size,
+            "error": type(error).__name__ if error is not None else (result["error"] if error_result else None),
+            "slow": slow,
+        }
+        if CALL_LOG:
+            call_log.info(json.dumps(event))
+
+        if slow and stats.statements and random.random() < SLOW_SAMPLE_RATE:
+            sample = {**event, "arguments": arguments, "at": time.time(), "statements": [
+                {"sql": " ".join(sql.split()), "params": params, "ms": round(seconds * 1000, 2), "rows": rows}
+                for sql, params, seconds, rows in stats.statements
+            ]}
+            self.slow_calls.append(sample)
+            if self.explain is not None and SLOW_EXPLAIN != "off":
+                self._explain_later(sample, stats.statements)
+
+    def _explain_later(self, sample, statements):
+        async def explain():
+            for entry, (sql, params, _, _) in zip(sample["statements"], statements):
+                try:
+                    entry["plan"] = await self.explain(sql, params, SLOW_EXPLAIN == "analyze")
+                except Exception as e:
+                    entry["plan"] = f"EXPLAIN failed: {e}"
+            call_log.warning(json.dumps({"event": "mcp_slow_call", **sample}, default=str))
+
+        try:
+            task = asyncio.get_running_loop().create_task(explain())
+        except RuntimeError:  # no loop (called from a plain thread)
+            return
+        # Keep a reference until done so the task is not garbage collected
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self):
+        with self._lock:
+            tools = {}
+            for tool, t in sorted(self._tools.items()):
+                recent = sorted(t.recent)
+                tools[tool] = {
+                    "calls": t.calls,
+                    "errors": t.errors,
+                    "errorResults": t.error_results,
+                    "slowCalls": t.slow,
+                    "wallMsTotal": round(t.wall * 1000, 2),
+                    "wallMsMax": round(t.max_wall * 1000, 2),
+                    "wallMsP50": round(_percentile(recent, 0.5) * 1000, 2) if recent else None,
+                    "wallMsP95": round(_percentile(recent, 0.95) * 1000, 2) if recent else None,
+                    "wallMsP99": round(_percentile(recent, 0.99) * 1000, 2) if recent else None,
+                    "dbMsTotal": round(t.db * 1000, 2),
+                    "queries": t.queries,
+                    "rowsReturned": t.rows,
+                    "rowsScanned": t.scanned,
+                    "responseBytesTotal": t.bytes,
+                    "responseBytesMax": t.max_bytes,
+                }
+            return tools
+
+    def prometheus(self, pool_stats=None):
+        """The totals in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = [
+                ("mcp_tool_calls_total", "calls"),
+                ("mcp_tool_errors_total", "errors"),
+                ("mcp_tool_slow_calls_total", "slow"),
+                ("mcp_tool_wall_seconds_total", "wall"),
+                ("mcp_tool_db_seconds_total", "db"),
+                ("mcp_tool_queries_total", "queries"),
+                ("mcp_tool_rows_returned_total", "rows"),
+                ("mcp_tool_rows_scanned_total", "scanned"),
+                ("mcp_tool_response_bytes_total", "bytes"),
+            ]
+            for name, field in counters:
+                lines.append(f"# TYPE {name} counter")
+                for tool, t in sorted(self._tools.items()):
+                    lines.append(f'{name}{{tool="{tool}"}} {getattr(t, field)}')
+        for key, value in (pool_stats or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f"mcp_pool_{re.sub(r'(?<!^)(?=[A-Z])', '_', key).lower()} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,167 @@
+"""
+Warm-up after deploys and imports.
+
+Two stages, both bounded by a time budget:
+1. prewarm_relations() loads the hot tables, their TOAST data and indexes
+   into shared buffers with pg_prewarm.
+2. run_landing_requests() replays the requests the viewer's landing page
+   makes (stats, status counts, the first page of every sort, the showcase
+   tenders from TenderList.tsx), which fills the API's in-process caches.
+
+The API runs both at startup; the importer runs them after run_import, with
+the landing requests sent to WARMUP_API_URL when it is set.
+"""
+
+import logging
+import os
+import time
+import urllib.parse
+import urllib.request
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+WARMUP_BUDGET_SECONDS = float(os.getenv("WARMUP_BUDGET_SECONDS", "20"))
+
+HOT_TABLES = ["tender_summaries", "tenders", "tender_aliases", "tender_subresources"]
+
+# Keep in sync with showcaseTenderIds in tender-viewer/src/components/TenderList.tsx
+SHOWCASE_TENDER_IDS = os.getenv(
+    "WARMUP_TENDER_IDS", "ocds-ptecst-133262,ocds-ptecst-133299,ocds-ptecst-133238"
+).split(",")
+
+LIST_SORTS = ["startDate", "dateModified", "value", "title", "endDate", "complexity"]
+
+
+def landing_requests():
+    """(path, params) pairs the landing page issues, most important first."""
+    requests = [
+        ("/tenders/stats", {}),
+        ("/tenders/meta/statuses", {}),
+        ("/tenders", {"limit": 3, "sort_by": "dateModified", "descending": True,
+                      "min_value": 1, "has_date": "yes"}),
+    ]
+    requests += [(f"/tenders/{tid.strip()}", {}) for tid in SHOWCASE_TENDER_IDS if tid.strip()]
+    requests += [("/tenders", {"limit": 50, "offset": 0, "sort_by": sort, "descending": True, "has_date": "yes"})
+                 for sort in LIST_SORTS]
+    requests.append(("/contracts", {"limit": 50, "offset": 0, "sort_by": "dateSigned", "descending": True}))
+    return requests
+
+
+class Deadline:
+    def __init__(self, budget):
+        self.started = time.monotonic()
+        self.expires = self.started + budget
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def elapsed(self):
+        return round(time.monotonic() - self.started, 3)
+
+
+def prewarm_relations(engine, deadline):
+    """Load hot relations into shared buffers; returns [{name, blocks|error}]."""
+    report = []
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_prewarm"))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.warning("pg_prewarm unavailable, skipping buffer prewarm: %s", e)
+            return [{"name": "pg_prewarm", "error": "extension unavailable"}]
+
+        # Indexes first (smallest first): every query touches them, and
+        # a budget that runs out should cut the big heaps, not the indexes
+        relations = conn.execute(text("""
+            WITH hot AS (
+                -- Leaf partitions when partitioned by year, else the table itself
+                SELECT tree.relid AS oid
+                FROM unnest(CAST(:tables AS text[])) AS name,
+                     pg_partition_tree(to_regclass(name)) AS tree
+                WHERE tree.isleaf
+            )
+            SELECT rel::regclass::text, stage FROM (
+                SELECT i.indexrelid AS rel, 0 AS stage FROM pg_index i JOIN hot ON i.indrelid = hot.oid
+                UNION ALL
+                SELECT hot.oid, 1 FROM hot
+                UNION ALL
+                SELECT c.reltoastrelid, 2 FROM pg_class c JOIN hot ON c.oid = hot.oid
+                WHERE c.reltoastrelid <> 0
+            ) r
+            ORDER BY stage, pg_relation_size(rel)
+        """), {"tables": HOT_TABLES}).fetchall()
+
+        for name, _ in relations:
+            remaining_ms = int(deadline.remaining() * 1000)
+            if remaining_ms <= 0:
+                report.append({"name": name, "error": "budget exhausted"})
+                continue
+            try:
+                conn.execute(text(f"SET statement_timeout = {remaining_ms}"))
+                blocks = conn.execute(text("SELECT pg_prewarm(CAST(:rel AS regclass))"), {"rel": name}).scalar()
+                report.append({"name": name, "blocks": blocks})
+            except Exception as e:
+                conn.rollback()
+                report.append({"name": name, "error": str(e).splitlines()[0]})
+        conn.execute(text("RESET statement_timeout"))
+    return report
+
+
+def _request_name(path, params):
+    return f"{path}?sort_by={params['sort_by']}" if "sort_by" in params else path
+
+
+def run_landing_requests(fetch, deadline):
+    """
+    Issue every landing request through fetch(path, params, timeout) until the
+    deadline; returns [{name, seconds, status}].
+    """
+    report = []
+    for path, params in landing_requests():
+        name = _request_name(path, params)
+        if deadline.remaining() <= 0:
+            report.append({"name": name, "status": "skipped"})
+            continue
+        started = time.monotonic()
+        try:
+            status = fetch(path, params, deadline.remaining())
+        except Exception as e:
+            status = f"error: {e}"
+        report.append({"name": name, "seconds": round(time.monotonic() - started, 3), "status": status})
+    return report
+
+
+def http_fetch(base_url):
+    """fetch() for run_landing_requests that goes through a running API."""
+    def fetch(path, params, timeout):
+        query = urllib.parse.urlencode({k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()})
+        url = f"{base_url.rstrip('/')}{urllib.parse.quote(path)}" + (f"?{query}" if query else "")
+        with urllib.request.urlopen(url, timeout=max(timeout, 0.1)) as response:
+            response.read()
+            return response.status
+    return fetch
+
+
+def warm_up(engine, fetch=None, budget=WARMUP_BUDGET_SECONDS):
+    """
+    Prewarm buffers, then (if fetch is given) replay the landing requests,
+    all within budget seconds. Returns the report; budget <= 0 disables it.
+    """
+    if budget <= 0:
+        return {"seconds": 0, "budgetSeconds": budget, "skipped": True}
+    deadline = Deadline(budget)
+    report = {"budgetSeconds": budget}
+    try:
+        report["relations"] = prewarm_relations(engine, deadline)
+    except Exception as e:
+        logger.warning("Buffer prewarm failed: %s", e)
+        report["relations"] = [{"name": "pg_prewarm", "error": str(e).splitlines()[0]}]
+    if fetch is not None:
+        report["requests"] = run_landing_requests(fetch, deadline)
+    report["seconds"] = deadline.elapsed()
+    report["prewarmedBlocks"] = sum(r.get("blocks", 0) for r in report["relations"])
+    logger.info("Warm-up finished in %.2fs (%d blocks prewarmed)", report["seconds"], report["prewarmedBlocks"])
+    return report
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+End-to-end replay throughput of full_import.py against the local mock API
+(mock_api.py), at one or more concurrency levels.
+
+For each level a fresh mock server is started in its own process and the
+records are replayed through full_import.replay (no journal). Throughput is
+counted from the tenders the mock holds as complete, not from what the client
+believes, and a run is flagged (exit status 1) unless the mock holds exactly
+one tender per record and all of them are complete.
+
+    python bench_replay.py --records 500 --concurrency 1,8,32 --latency 30
+    python bench_replay.py --file "OCDS 2025.10.06/record-package-latest.json" --limit 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import full_import
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def synthetic_package(path, records, bidders=3):
+    """Write an OCDS record package of `records` tenders, each with bids, one award and one contract."""
+    categories = ("works", "services", "goods")
+    with open(path, "w") as f:
+        f.write('{"records": [')
+        for i in range(records):
+            amount = 1000 + i * 10
+            tenderers = [{"name": f"Supplier {i}-{b}", "id": f"S{i}-{b}"} for b in range(bidders)]
+            release = {
+                "ocid": f"ocds-bench-{i:06d}",
+                "tender": {
+                    "id": f"T-{i}",
+                    "title": f"Benchmark tender {i}",
+                    "description": "Synthetic tender for replay benchmarking",
+                    "status": "complete",
+                    "mainProcurementCategory": categories[i % 3],
+                    "value": {"amount": amount, "currency": "USD"},
+                    "items": [{"id": "1", "description": f"Item of tender {i}", "quantity": 1}],
+                    "tenderers": tenderers,
+                },
+                "awards": [{"id": f"A-{i}", "status": "active", "suppliers": tenderers[:1],
+                            "value": {"amount": amount * 0.9, "currency": "USD"}}],
+                "contracts": [{"id": f"C-{i}", "awardID": f"A-{i}", "status": "active",
+                               "value": {"amount": amount * 0.9, "currency": "USD"}}],
+            }
+            f.write(("," if i else "") + json.dumps({"ocid": release["ocid"], "compiledRelease": release}))
+        f.write("]}")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args):
+    port = _free_port()
+    command = [sys.executable, os.path.join(HERE, "mock_api.py"), "--port", str(port),
+               "--latency", str(args.latency), "--jitter", str(args.jitter),
+               "--error-rate", str(args.error_rate), "--throttle-rate", str(args.throttle_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("mock API did not start")
+
+
+def mock_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/mock/stats") as resp:
+        return json.load(resp)
+
+
+def bench(data_file, concurrency, limit, args):
+    process, port = start_mock(args)
+    try:
+        full_import.API_URL = f"http://127.0.0.1:{port}/api/2.4/tenders"
+        started = time.monotonic()
+        stats = asyncio.run(full_import.replay(data_file, concurrency, limit))
+        seconds = time.monotonic() - started
+        server = mock_stats(port)
+    finally:
+        process.terminate()
+        process.wait()
+    records = stats.started
+    complete = server["byStatus"].get("complete", 0)
+    return {
+        "concurrency": concurrency,
+        "records": records,
+        "tenders": complete,
+        "failed": stats.failed,
+        "seconds": round(seconds, 2),
+        "tendersPerMin": round(complete / seconds * 60, 1),
+        "requestsPerSec": round(stats.requests / seconds, 1),
+        "consistent": server["tenders"] == records and complete == records,
+        "server": server,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full_import.py replay against the mock API")
+    parser.add_argument("--file", help="OCDS record package to replay (default: synthetic records)")
+    parser.add_argument("--records", type=int, default=500, help="Synthetic records to generate")
+    parser.add_argument("--bidders", type=int, default=3, help="Bids per synthetic tender")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many records of --file")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated tenders in flight to try")
+    parser.add_argument("--latency", type=float, default=30.0, help="Mock latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=10.0, help="Extra random mock latency, up to this (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        data_file = args.file
+        if data_file is None:
+            data_file = os.path.join(tmp, "records.json")
+            synthetic_package(data_file, args.records, args.bidders)
+        results = [bench(data_file, level, args.limit, args) for level in levels]
+
+    consistent = all(r["consistent"] for r in results)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        sys.exit(0 if consistent else 1)
+    print(f"\nMock latency {args.latency:g}+{args.jitter:g} ms, errors {args.error_rate:g}, "
+          f"throttled {args.throttle_rate:g}")
+    print(f"{'concurrency':>11} {'records':>8} {'complete':>8} {'failed':>7} {'seconds':>8} "
+          f"{'tenders/min':>12} {'requests/s':>11}  server")
+    for r in results:
+        server = r["server"]
+        print(f"{r['concurrency']:>11} {r['records']:>8} {r['tenders']:>8} {r['failed']:>7} {r['seconds']:>8} "
+              f"{r['tendersPerMin']:>12} {r['requestsPerSec']:>11}  "
+              f"{server['tenders']} tenders {server['byStatus']}, injected {server['injected']}"
+              f"{'' if r['consistent'] else '  MISMATCH'}")
+    if not consistent:
+        print("Mock state does not match the records: some tenders were duplicated or not completed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
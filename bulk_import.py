@@ -2,16 +2,15 @@
 import ijson
 import argparse
 import logging
-import time
 import json
-import requests
-from upload_ocds import transform_release_to_tender, API_URL, HEADERS
+from upload_ocds import transform_release_to_tender, API_URL, make_client, add_rate_arguments
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def process_file(filename, limit=0):
+def process_file(filename, limit=0, client=None):
     logger.info(f"Opening {filename}...")
+    client = client or make_client()
     count = 0
     success = 0
     errors = 0
@@ -36,8 +35,8 @@ def process_file(filename, limit=0):
                 release = record['compiledRelease']
                 payload = transform_release_to_tender(release)
                 
-                # Use session for performance?
-                response = requests.post(API_URL, json=payload, headers=HEADERS)
+                # Paced and retried by the shared client (rate_control.py)
+                response = client.post(API_URL, json=payload)
                 
                 if response.status_code == 201:
                     success += 1
@@ -49,14 +48,13 @@ def process_file(filename, limit=0):
                 errors += 1
                 logger.error(f"Error: {e}")
 
-            time.sleep(0.05) # fast sleep to prevent complete overwhelm but fast throughput
-
-    logger.info(f"Done. Total: {count}, Success: {success}, Errors: {errors}")
+    logger.info(f"Done. Total: {count}, Success: {success}, Errors: {errors}, Client: {client.stats()}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('file', help='Path to OCDS JSON file')
     parser.add_argument('--limit', type=int, default=0)
+    add_rate_arguments(parser)
     args = parser.parse_args()
     
-    process_file(args.file, args.limit)
+    process_file(args.file, args.limit, make_client(args.max_rate, args.retries))
@@ -1,13 +1,19 @@
-import requests
+import argparse
+import asyncio
 import json
 import ijson
 import hashlib
+import signal
+import sqlite3
+import time
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 import os
 import base64
 
+from rate_control import RETRY_STATUSES, backoff_delay
+
 API_HOST = os.getenv("API_HOST", "localhost")
 API_PORT = os.getenv("API_PORT", "6543")
 API_URL = f"http://{API_HOST}:{API_PORT}/api/2.4/tenders"
@@ -43,144 +49,414 @@ def map_decimal(obj):
         return [map_decimal(v) for v in obj]
     return obj
 
-def full_import():
-    print(f"Starting import from {DATA_FILE}")
-    
-    with open(DATA_FILE, 'rb') as f:
-        # Iterate over records
-        for record in ijson.items(f, 'records.item'):
+# --- Concurrent replay ---
+# Every record is replayed as its own state machine (TenderReplay). Many run at
+# once over one keep-alive connection pool, but the steps of one tender stay
+# strictly ordered, as the API's workflow requires (bids need
+# active.tendering, awards need active.qualification, ...).
+
+REPLAY_CONCURRENCY = int(os.getenv("REPLAY_CONCURRENCY", "16"))
+REQUEST_TIMEOUT = float(os.getenv("REPLAY_REQUEST_TIMEOUT", "60"))
+REPLAY_JOURNAL = os.getenv("REPLAY_JOURNAL", "replay_journal.sqlite3")
+REPLAY_RETRIES = int(os.getenv("REPLAY_RETRIES", "5"))
+PROGRESS_INTERVAL = 10
+
+# Lifecycle of one tender, in order; each state is a TenderReplay step
+STATES = ("create", "activate", "bids", "qualify", "awards", "contracts", "complete", "done")
+
+
+class ReplayStats:
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.requests = 0
+        self.retries = 0
+        self.skipped = 0
+        self.resumed = 0
+        self.stopped = 0
+
+    def line(self):
+        minutes = max(time.monotonic() - self.started_at, 1e-9) / 60
+        finished = self.completed + self.failed
+        return (f"{finished} tenders ({self.completed} complete, {self.failed} failed, "
+                f"{self.started - finished - self.stopped} in flight, {self.stopped} stopped, {self.resumed} resumed, "
+                f"{self.skipped} already done), {self.requests} requests ({self.retries} retried), "
+                f"{finished / minutes:.1f} tenders/min, {self.requests / minutes / 60:.1f} requests/s")
+
+
+class ReplayStopped(Exception):
+    """Raised instead of sending a request once the replay is shutting down."""
+
+
+class ReplayJournal:
+    """
+    Local SQLite record of how far each OCID got: the remote tender ID and
+    token, the next lifecycle state, and the bids, awards and contracts
+    already created. Every successful request is saved before the next one is
+    sent, so after a crash a rerun skips finished tenders and resumes the rest
+    where they stopped, without creating anything twice. Only a request in
+    flight at the moment of the crash can be repeated, since the API has no
+    idempotency keys.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Used only from the event loop's thread; every write is one small row
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS replayed_tenders (
+                ocid TEXT PRIMARY KEY,
+                tender_id TEXT,
+                token TEXT,
+                state TEXT NOT NULL,
+                progress TEXT NOT NULL DEFAULT '{}',
+                updated_at TEXT NOT NULL
+            )
+        """)
+
+    def finished(self):
+        """OCIDs replayed to the end."""
+        return {row[0] for row in self.conn.execute("SELECT ocid FROM replayed_tenders WHERE state = 'done'")}
+
+    def get(self, ocid):
+        row = self.conn.execute(
+            "SELECT tender_id, token, state, progress FROM replayed_tenders WHERE ocid = ?", (ocid,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"tender_id": row[0], "token": row[1], "state": row[2], "progress": json.loads(row[3])}
+
+    def save(self, replay):
+        self.conn.execute(
+            """
+            INSERT INTO replayed_tenders (ocid, tender_id, token, state, progress, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (ocid) DO UPDATE SET tender_id = excluded.tender_id, token = excluded.token,
+                state = excluded.state, progress = excluded.progress, updated_at = excluded.updated_at
+            """,
+            (replay.ocid, replay.tender_id, replay.token, replay.state,
+             json.dumps(replay.progress()), get_now_formatted()),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+class TenderReplay:
+    """Replays one compiled release through the API, step by step."""
+
+    def __init__(self, release, session, stats, journal=None, stop=None):
+        self.release = release
+        self.ocid = release.get('ocid')
+        self.session = session
+        self.stats = stats
+        self.journal = journal
+        self.stop = stop  # asyncio.Event set on Ctrl-C
+        self.state = STATES[0]
+        self.tender_data = map_decimal(map_tender(release))
+        self.tender_id = None
+        self.token = None
+        self.bid_map = {}  # supplier name -> bid_id
+        self.award_map = {}  # ocds_award_id -> api_award_id
+        self.contract_map = {}  # ocds_contract_id -> api_contract_id
+        self.activated = set()  # ocds_contract_ids already activated
+
+    def progress(self):
+        return {"bids": self.bid_map, "awards": self.award_map,
+                "contracts": self.contract_map, "activated": sorted(self.activated)}
+
+    def restore(self, entry):
+        """Continue from a journal entry instead of the start."""
+        self.tender_id = entry['tender_id']
+        self.token = entry['token']
+        self.state = entry['state']
+        progress = entry['progress']
+        self.bid_map = progress.get('bids', {})
+        self.award_map = progress.get('awards', {})
+        self.contract_map = progress.get('contracts', {})
+        self.activated = set(progress.get('activated', []))
+
+    def checkpoint(self):
+        if self.journal is not None:
+            self.journal.save(self)
+
+    @property
+    def patch_url(self):
+        return f"{API_URL}/{self.tender_id}?acc_token={self.token}"
+
+    def log(self, message):
+        print(f"[{self.ocid}] {message}")
+
+    async def call(self, method, url, payload, headers):
+        """
+        (status, body text) of one API request. Throttled and unavailable
+        responses (429, 502, 503, 504), and failures to connect, were not
+        applied by the API and are retried with backoff (see rate_control.py).
+        """
+        from aiohttp import ClientConnectorError
+
+        attempt = 0
+        while True:
+            if self.stop is not None and self.stop.is_set():
+                raise ReplayStopped()
+            self.stats.requests += 1
             try:
-                if 'compiledRelease' not in record:
-                    continue
-                
-                release = record['compiledRelease']
-                ocid = release.get('ocid')
-                print(f"Processing OCID: {ocid}")
-                
-                # 1. Map Tender Data
-                raw_tender_data = map_tender(release)
-                tender_data = map_decimal(raw_tender_data)
-                
-                # Create Tender
-                resp = requests.post(API_URL, json={"data": tender_data}, headers=HEADERS_BROKER)
-                if resp.status_code != 201:
-                    print(f"Failed to create tender {ocid}: {resp.text}")
-                    continue
-                    
-                tender_id = resp.json()['data']['id']
-                token = resp.json()['access']['token']
-                print(f"  Created Tender {tender_id}")
-                
-                # 2. Patch to active.tendering
-                patch_url = f"{API_URL}/{tender_id}?acc_token={token}"
-                resp = requests.patch(patch_url, json={"data": {"status": "active.tendering"}}, headers=HEADERS_BROKER)
-                if resp.status_code != 200:
-                    print(f"  Failed to patch to active.tendering: {resp.text}")
+                async with self.session.request(method, url, json={"data": payload}, headers=headers) as resp:
+                    status, body = resp.status, await resp.text()
+                    retry_after = resp.headers.get("Retry-After")
+            except ClientConnectorError:
+                if attempt >= REPLAY_RETRIES:
+                    raise
+                status, body, retry_after = None, None, None
+            else:
+                if status not in RETRY_STATUSES or attempt >= REPLAY_RETRIES:
+                    return status, body
+            delay = backoff_delay(attempt)
+            try:
+                delay = max(delay, float(retry_after)) if retry_after is not None else delay
+            except ValueError:  # HTTP-date form
+                pass
+            attempt += 1
+            self.stats.retries += 1
+            await asyncio.sleep(delay)
+
+    async def run(self):
+        """
+        Advance through STATES until done; False if a step failed. A failed
+        step keeps its state, so a rerun retries it (skipping the bids, awards
+        and contracts it already created).
+        """
+        while self.state != "done":
+            next_state = await getattr(self, f"step_{self.state}")()
+            if next_state is None:
+                return False
+            self.state = next_state
+            self.checkpoint()
+        return True
+
+    # Each step returns the next state, or None when it failed
+
+    async def step_create(self):
+        status, body = await self.call("POST", API_URL, self.tender_data, HEADERS_BROKER)
+        if status != 201:
+            self.log(f"Failed to create tender: {body}")
+            return None
+        created = json.loads(body)
+        self.tender_id = created['data']['id']
+        self.token = created['access']['token']
+        return "activate"
+
+    async def step_activate(self):
+        status, body = await self.call("PATCH", self.patch_url, {"status": "active.tendering"}, HEADERS_BROKER)
+        if status != 200:
+            self.log(f"Failed to patch to active.tendering: {body}")
+            return None
+        return "bids"
+
+    async def step_bids(self):
+        # Synthesis: From tender.tenderers AND awards.suppliers
+        bidders = {}
+        for t in (self.release.get('tender') or {}).get('tenderers') or []:
+            bidders[t['name']] = t
+        for aw in self.release.get('awards') or []:
+            for s in aw.get('suppliers') or []:
+                bidders[s['name']] = s
+
+        failed = False
+        for name, supplier_data in bidders.items():
+            if name in self.bid_map:  # created before a restart
+                continue
+            bid_payload = map_decimal(map_bid(supplier_data, self.tender_data['value']))
+            status, body = await self.call("POST", f"{API_URL}/{self.tender_id}/bids", bid_payload, HEADERS_BIDDER)
+            if status == 201:
+                self.bid_map[name] = json.loads(body)['data']['id']
+                self.checkpoint()
+            else:
+                self.log(f"Failed to create bid for {name}: {body}")
+                failed = True
+        return None if failed else "qualify"
+
+    async def step_qualify(self):
+        status, body = await self.call("PATCH", self.patch_url, {"status": "active.qualification"}, HEADERS_BROKER)
+        if status != 200:
+            self.log(f"Failed to patch to active.qualification: {body}")
+            return None
+        return "awards"
+
+    async def step_awards(self):
+        failed = False
+        for aw in self.release.get('awards') or []:
+            # Find bid_id
+            bid_id = None
+            if aw.get('suppliers'):
+                bid_id = self.bid_map.get(aw['suppliers'][0]['name'])
+            if not bid_id:
+                self.log(f"Skipping award {aw.get('id')} - No matching bid")
+                continue
+            if aw['id'] in self.award_map:
+                continue
+
+            award_payload = map_decimal(map_award(aw, bid_id))
+            status, body = await self.call("POST", f"{API_URL}/{self.tender_id}/awards", award_payload, HEADERS_BROKER)
+            if status == 201:
+                self.award_map[aw['id']] = json.loads(body)['data']['id']
+                self.checkpoint()
+            else:
+                self.log(f"Failed to create award: {body}")
+                failed = True
+        return None if failed else "contracts"
+
+    async def step_contracts(self):
+        failed = False
+        for c in self.release.get('contracts') or []:
+            api_award_id = self.award_map.get(c.get('awardID'))
+            if not api_award_id:
+                self.log(f"Skipping contract {c.get('id')} - Award not found or skipped")
+                continue
+            key = c.get('id')
+            if key in self.activated:
+                continue
+
+            contract_id = self.contract_map.get(key)
+            if contract_id is None:
+                contract_payload = map_decimal(map_contract(c, api_award_id, self.tender_data.get('title')))
+                status, body = await self.call("POST", f"{API_URL}/{self.tender_id}/contracts", contract_payload, HEADERS_BROKER)
+                if status != 201:
+                    self.log(f"Failed to create contract: {body}")
+                    failed = True
                     continue
+                contract_id = json.loads(body)['data']['id']
+                self.contract_map[key] = contract_id
+                self.checkpoint()
+
+            # Activate Contract
+            patch_contract_url = f"{API_URL}/{self.tender_id}/contracts/{contract_id}?acc_token={self.token}"
+            status, body = await self.call("PATCH", patch_contract_url, {"status": "active"}, HEADERS_BROKER)
+            if status != 200:
+                self.log(f"Failed to activate contract: {body}")
+                failed = True
+                continue
+            self.activated.add(key)
+            self.checkpoint()
+        return None if failed else "complete"
+
+    async def step_complete(self):
+        status, body = await self.call("PATCH", self.patch_url, {"status": "complete"}, HEADERS_BROKER)
+        if status != 200:
+            self.log(f"Failed to complete tender: {body}")
+            return None
+        return "done"
+
+
+def iter_releases(data_file, limit=0):
+    count = 0
+    with open(data_file, 'rb') as f:
+        for record in ijson.items(f, 'records.item'):
+            if 'compiledRelease' not in record:
+                continue
+            yield record['compiledRelease']
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+async def _replay_one(release, session, stats, journal=None, stop=None):
+    stats.started += 1
+    try:
+        replay = TenderReplay(release, session, stats, journal, stop)
+        entry = journal.get(replay.ocid) if journal is not None else None
+        if entry is not None:
+            replay.restore(entry)
+            stats.resumed += 1
+            replay.log(f"Resuming at {replay.state} (tender {replay.tender_id})")
+        ok = await replay.run()
+    except ReplayStopped:
+        stats.stopped += 1
+        return
+    except Exception as e:
+        print(f"[{release.get('ocid')}] Error processing record: {e!r}")
+        ok = False
+    if ok:
+        stats.completed += 1
+    else:
+        stats.failed += 1
+
+
+async def _report_progress(stats):
+    while True:
+        await asyncio.sleep(PROGRESS_INTERVAL)
+        print(f"Progress: {stats.line()}")
+
+
+async def replay(data_file=DATA_FILE, concurrency=REPLAY_CONCURRENCY, limit=0, journal=None):
+    """
+    Replay every record of data_file with up to `concurrency` tenders in flight.
+    With a ReplayJournal, records it marks finished are skipped and partial
+    ones resume from their last completed step.
+    """
+    import aiohttp
+
+    stats = ReplayStats()
+    finished = journal.finished() if journal is not None else set()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def request_stop():
+        # Let requests in flight finish and reach the journal; a second Ctrl-C aborts
+        print("Stopping: finishing requests in flight (Ctrl-C again to abort)")
+        stop.set()
+        loop.remove_signal_handler(signal.SIGINT)
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, request_stop)
+    except (NotImplementedError, RuntimeError):  # Windows, or not the main thread
+        pass
 
-                # 3. Create Bids
-                # Synthesis: From tender.tenderers AND awards.suppliers
-                bidders = {}
-                
-                # From tenderers
-                if 'tender' in release and 'tenderers' in release['tender']:
-                    for t in release['tender']['tenderers']:
-                        bidders[t['name']] = t
-                
-                # From awards suppliers
-                if 'awards' in release:
-                    for aw in release['awards']:
-                        if 'suppliers' in aw:
-                            for s in aw['suppliers']:
-                                bidders[s['name']] = s
-                
-                # Create each bid
-                bid_map = {} # name -> bid_id
-                
-                for name, supplier_data in bidders.items():
-                    raw_bid_payload = map_bid(supplier_data, tender_data['value'])
-                    bid_payload = map_decimal(raw_bid_payload)
-                    
-                    bid_url = f"{API_URL}/{tender_id}/bids"
-                    resp = requests.post(bid_url, json={"data": bid_payload}, headers=HEADERS_BIDDER)
-                    if resp.status_code == 201:
-                        bid_id = resp.json()['data']['id']
-                        bid_map[name] = bid_id
-                        print(f"  Created Bid for {name}")
-                    else:
-                        print(f"  Failed to create bid for {name}: {resp.text}")
-
-                # 4. Patch to active.qualification
-                resp = requests.patch(patch_url, json={"data": {"status": "active.qualification"}}, headers=HEADERS_BROKER)
-                if resp.status_code != 200:
-                    print(f"  Failed to patch to active.qualification: {resp.text}")
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    def release_slot(task):
+        tasks.discard(task)
+        slots.release()
+
+    # One pooled, keep-alive connection per tender in flight
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, keepalive_timeout=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as session:
+        reporter = asyncio.create_task(_report_progress(stats))
+        try:
+            # Records are read lazily, only as fast as slots free up
+            for release in iter_releases(data_file, limit):
+                if release.get('ocid') in finished:
+                    stats.skipped += 1
                     continue
-                
-                # 5. Create Awards
-                award_map = {} # ocds_award_id -> api_award_id
-                if 'awards' in release:
-                    for aw in release['awards']:
-                        # Find bid_id
-                        bid_id = None
-                        if 'suppliers' in aw and len(aw['suppliers']) > 0:
-                            s_name = aw['suppliers'][0]['name']
-                            bid_id = bid_map.get(s_name)
-                        
-                        if not bid_id:
-                            print(f"  Skipping award {aw.get('id')} - No matching bid")
-                            continue
-                            
-                        raw_award_payload = map_award(aw, bid_id)
-                        award_payload = map_decimal(raw_award_payload)
-                        
-                        award_url = f"{API_URL}/{tender_id}/awards"
-                        resp = requests.post(award_url, json={"data": award_payload}, headers=HEADERS_BROKER)
-                        if resp.status_code == 201:
-                            api_award_id = resp.json()['data']['id']
-                            award_map[aw['id']] = api_award_id
-                            print(f"  Created Award {api_award_id}")
-                        else:
-                            print(f"  Failed to create award: {resp.text}")
-
-                # 6. Create Contracts
-                if 'contracts' in release:
-                    for c in release['contracts']:
-                        ocds_award_id = c.get('awardID')
-                        api_award_id = award_map.get(ocds_award_id)
-                        
-                        if not api_award_id:
-                            print(f"  Skipping contract {c.get('id')} - Award not found or skipped")
-                            continue
-                            
-                        raw_contract_payload = map_contract(c, api_award_id, tender_data.get('title'))
-                        contract_payload = map_decimal(raw_contract_payload)
-                        
-                        contract_url = f"{API_URL}/{tender_id}/contracts"
-                        resp = requests.post(contract_url, json={"data": contract_payload}, headers=HEADERS_BROKER)
-                        
-                        if resp.status_code == 201:
-                            contract_id = resp.json()['data']['id']
-                            print(f"  Created Contract {contract_id}")
-                            
-                            # Activate Contract
-                            patch_contract_url = f"{API_URL}/{tender_id}/contracts/{contract_id}?acc_token={token}"
-                            resp = requests.patch(patch_contract_url, json={"data": {"status": "active"}}, headers=HEADERS_BROKER)
-                            if resp.status_code != 200:
-                                print(f"  Failed to activate contract: {resp.text}")
-                        else:
-                            print(f"  Failed to create contract: {resp.text}")
-
-                # 7. Patch to complete
-                resp = requests.patch(patch_url, json={"data": {"status": "complete"}}, headers=HEADERS_BROKER)
-                if resp.status_code == 200:
-                    print(f"  Tender {ocid} Complete")
-                else:
-                    print(f"  Failed to complete tender: {resp.text}")
-
-            except Exception as e:
-                print(f"Error processing record: {e}")
-                import traceback
-                traceback.print_exc()
+                await slots.acquire()
+                if stop.is_set():
+                    break
+                task = asyncio.create_task(_replay_one(release, session, stats, journal, stop))
+                tasks.add(task)
+                task.add_done_callback(release_slot)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            reporter.cancel()
+    print(f"Done: {stats.line()}")
+    return stats
+
+
+def full_import(data_file=DATA_FILE, concurrency=REPLAY_CONCURRENCY, limit=0, journal_path=REPLAY_JOURNAL):
+    print(f"Starting import from {data_file} ({concurrency} tenders at a time)")
+    journal = ReplayJournal(journal_path) if journal_path else None
+    if journal is not None:
+        print(f"Journal: {journal_path}")
+    try:
+        return asyncio.run(replay(data_file, concurrency, limit, journal))
+    finally:
+        if journal is not None:
+            journal.close()
 
 def map_contract(contract, award_id, tender_title=None):
     now = datetime.now()
@@ -479,4 +755,11 @@ def map_period(period):
     }
 
 if __name__ == "__main__":
-    full_import()
+    parser = argparse.ArgumentParser(description="Replay OCDS records into the OpenProcurement API")
+    parser.add_argument('file', nargs='?', default=DATA_FILE, help='Path to OCDS record package JSON')
+    parser.add_argument('--concurrency', type=int, default=REPLAY_CONCURRENCY, help='Tenders replayed at once')
+    parser.add_argument('--limit', type=int, default=0, help='Stop after this many records')
+    parser.add_argument('--journal', default=REPLAY_JOURNAL,
+                        help='SQLite file recording replay progress, to resume after a crash ("" to disable)')
+    args = parser.parse_args()
+    full_import(args.file, args.concurrency, args.limit, args.journal)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-in for the OpenProcurement API at localhost:6543, covering
+the endpoints the import scripts use (full_import.py, bulk_import.py,
+upload_ocds.py, test_awards_import.py, test_workflow_import.py):
+
+    POST  /api/2.4/tenders                          create, returns data + access token
+    GET   /api/2.4/tenders/{id}
+    PATCH /api/2.4/tenders/{id}?acc_token=          status changes
+    POST  /api/2.4/tenders/{id}/bids                only in active.tendering
+    POST  /api/2.4/tenders/{id}/awards              only in active.qualification
+    POST  /api/2.4/tenders/{id}/contracts
+    PATCH /api/2.4/tenders/{id}/contracts/{cid}?acc_token=
+
+It checks what the replay depends on (tender status for bids and awards,
+the tender's acc_token on PATCHes) and nothing else, so throughput can be
+measured and tuned offline. Latency, server errors (503, not applied) and
+throttling (429 with Retry-After) are injected at configurable rates.
+GET /mock/stats reports request counts and tenders by status.
+
+    python mock_api.py --latency 50 --jitter 20 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/2.4/tenders"
+_PATH = re.compile(r"^/api/[\d.]+/tenders(?:/(?P<tender>[0-9a-f]+)(?:/(?P<kind>bids|awards|contracts)(?:/(?P<item>[0-9a-f]+))?)?)?/?$")
+
+# Where bids and awards can be added, as the real API enforces
+ALLOWED_STATUS = {"bids": ("active.tendering",), "awards": ("active.qualification",)}
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _new_id():
+    return uuid.uuid4().hex
+
+
+class MockStore:
+    """Tenders kept in memory; one lock, as every operation is a few dict updates."""
+
+    def __init__(self):
+        self.tenders = {}
+        self.tokens = {}
+        self.requests = Counter()
+        self.injected = Counter()
+        self.lock = threading.Lock()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "tenders": len(self.tenders),
+                "byStatus": dict(Counter(t["status"] for t in self.tenders.values())),
+                "bids": sum(len(t.get("bids", [])) for t in self.tenders.values()),
+                "awards": sum(len(t.get("awards", [])) for t in self.tenders.values()),
+                "contracts": sum(len(t.get("contracts", [])) for t in self.tenders.values()),
+                "requests": dict(self.requests),
+                "injected": dict(self.injected),
+            }
+
+
+def _error(status, description, location="body", name="data"):
+    return status, {"status": "error", "errors": [{"location": location, "name": name, "description": description}]}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API behind its proxy
+    server_version = "MockOpenProcurement/1.0"
+    # Headers and body are written separately; without this, delayed ACKs add ~40 ms per response
+    disable_nagle_algorithm = True
+
+    # Set by make_server
+    store = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    throttle_rate = 0.0
+    retry_after = 1.0
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, headers=None):
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self):
+        try:
+            body = self._body() if self.command in ("POST", "PATCH") else {}
+        except ValueError:
+            return self._send(*_error(422, "Expecting JSON body"))
+
+        url = urlsplit(self.path)
+        if url.path == "/mock/stats":
+            return self._send(200, self.store.stats())
+        match = _PATH.match(url.path)
+        if match is None:
+            return self._send(*_error(404, "Not Found", "url", "url"))
+
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        route = f"{self.command} {match['kind'] or 'tender'}"
+        roll = random.random()
+        with self.store.lock:
+            self.store.requests[route] += 1
+            if roll < self.throttle_rate:
+                self.store.injected[429] += 1
+                injected = 429
+            elif roll < self.throttle_rate + self.error_rate:
+                self.store.injected[503] += 1
+                injected = 503
+            else:
+                injected = None
+        if injected == 429:
+            return self._send(*_error(429, "Too Many Requests", "header", "rate"),
+                              headers={"Retry-After": f"{self.retry_after:g}"})
+        if injected == 503:
+            return self._send(*_error(503, "Service Unavailable", "url", "url"))
+
+        token = parse_qs(url.query).get("acc_token", [None])[0]
+        data = body.get("data") or {}
+        with self.store.lock:
+            status, response, headers = self._dispatch(match, token, data)
+        self._send(status, response, headers)
+
+    def _dispatch(self, match, token, data):
+        store = self.store
+        tender_id, kind, item_id = match["tender"], match["kind"], match["item"]
+
+        if tender_id is None:
+            if self.command != "POST":
+                return (*_error(405, "Method Not Allowed", "url", "method"), None)
+            if "Authorization" not in self.headers:
+                return (*_error(401, "Authorization required", "header", "Authorization"), None)
+            tender_id, token = _new_id(), _new_id()
+            tender = {**data, "id": tender_id, "status": data.get("status", "draft"),
+                      "dateCreated": _now(), "dateModified": _now()}
+            for section in ("bids", "awards", "contracts"):
+                for entry in tender.get(section) or []:
+                    entry.setdefault("id", _new_id())
+            store.tenders[tender_id] = tender
+            store.tokens[tender_id] = token
+            location = f"http://{self.headers.get('Host', 'localhost')}{API_PREFIX}/{tender_id}"
+            return 201, {"data": tender, "access": {"token": token, "transfer": _new_id()}}, {"Location": location}
+
+        tender = store.tenders.get(tender_id)
+        if tender is None:
+            return (*_error(404, "Not Found", "url", "tender_id"), None)
+
+        if kind is None:
+            if self.command == "GET":
+                return 200, {"data": tender}, None
+            if self.command != "PATCH":
+                return (*_error(405, "Method Not Allowed", "url", "method"), None)
+            if token != store.tokens[tender_id]:
+                return (*_error(403, "Forbidden", "url", "permission"), None)
+            tender.update(data)
+            tender["dateModified"] = _now()
+            return 200, {"data": tender}, None
+
+        entries = tender.setdefault(kind, [])
+        if item_id is None:
+            if self.command == "GET":
+                return 200, {"data": entries}, None
+            if self.command != "POST":
+                return (*_error(405, "Method Not Allowed", "url", "method"), None)
+            allowed = ALLOWED_STATUS.get(kind)
+            if allowed and tender["status"] not in allowed:
+                return (*_error(403, f"Can't add {kind[:-1]} in current ({tender['status']}) tender status"), None)
+            entry = {**data, "id": _new_id(), "date": _now()}
+            entry.setdefault("status", "pending")
+            entries.append(entry)
+            response = {"data": entry}
+            if kind == "bids":
+                response["access"] = {"token": _new_id()}
+            return 201, response, None
+
+        entry = next((e for e in entries if e["id"] == item_id), None)
+        if entry is None:
+            return (*_error(404, "Not Found", "url", f"{kind[:-1]}_id"), None)
+        if self.command == "GET":
+            return 200, {"data": entry}, None
+        if self.command != "PATCH":
+            return (*_error(405, "Method Not Allowed", "url", "method"), None)
+        if token != store.tokens[tender_id]:
+            return (*_error(403, "Forbidden", "url", "permission"), None)
+        entry.update(data)
+        return 200, {"data": entry}, None
+
+    do_GET = do_POST = do_PATCH = _handle
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_server(host="127.0.0.1", port=6543, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                throttle_rate=0.0, retry_after=1.0, quiet=True):
+    """A MockServer with its own store; call serve_forever() (or run it in a thread)."""
+    handler = type("Handler", (MockHandler,), {
+        "store": MockStore(),
+        "latency": latency_ms / 1000,
+        "jitter": jitter_ms / 1000,
+        "error_rate": error_rate,
+        "throttle_rate": throttle_rate,
+        "retry_after": retry_after,
+        "quiet": quiet,
+    })
+    return MockServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory stand-in for the OpenProcurement API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6543)
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of throttled requests (s)")
+    parser.add_argument("--seed", type=int, help="Seed for the injected latency and errors")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    server = make_server(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                         args.throttle_rate, args.retry_after, quiet=not args.verbose)
+    print(f"Mock OpenProcurement API on http://{args.host}:{args.port}{API_PREFIX} "
+          f"(latency {args.latency:g}+{args.jitter:g} ms, errors {args.error_rate:g}, throttled {args.throttle_rate:g})",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Adaptive request pacing for the uploaders (bulk_import.py, upload_ocds.py).
+
+Requests go through one pooled, keep-alive requests.Session and a token
+bucket whose rate follows AIMD. As in TCP, a slow start grows the rate
+exponentially until the first sign of congestion; after that every success
+adds a little rate (about `increase` requests/s per second). A 429, a 5xx or
+a response slower than the latency target halves it, at most once per
+cooldown so one burst of errors counts once. The rate never exceeds the configured ceiling. Throttled
+and failed requests are retried with full-jitter exponential backoff, and a
+Retry-After header pauses the whole bucket.
+
+POSTs are not idempotent, so only failures where the API did not apply the
+request are retried: failures to connect (nothing was sent), 429, 502, 503
+and 504. A 500, a read timeout or a connection dropped after the request was
+sent may have created the tender and is returned or raised as is. Idempotent
+methods (GET, PUT, DELETE, ...) are retried after any connection error.
+"""
+
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 502, 503, 504}
+CONGESTION_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate, burst=1.0):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def pause(self, seconds):
+        """Hand out no tokens for `seconds` (a Retry-After from the server)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        start = max(self._updated, self._paused_until)
+        if now > start:
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1 and time.monotonic() >= self._paused_until:
+                    self._tokens -= 1
+                    return
+                wait = max((1 - self._tokens) / self.rate, self._paused_until - time.monotonic())
+            time.sleep(wait)
+
+
+class AdaptiveRateController:
+    def __init__(self, initial_rate=5.0, max_rate=50.0, min_rate=0.5, increase=1.0, decrease=0.5,
+                 latency_target=2.0, cooldown=1.0):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.rate = min(initial_rate, max_rate)
+        self.bucket = TokenBucket(self.rate, burst=max(1.0, self.rate / 10))
+        self._last_decrease = 0.0
+        self._slow_start = True
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.congestion = 0
+
+    def acquire(self):
+        self.bucket.acquire()
+
+    def record(self, status, latency):
+        """Adjust the rate after a response (status None for a connection error)."""
+        congested = status is None or status in CONGESTION_STATUSES or latency > self.latency_target
+        with self._lock:
+            if congested:
+                self.congestion += 1
+                now = time.monotonic()
+                if now - self._last_decrease < self.cooldown:
+                    return
+                self._last_decrease = now
+                self._slow_start = False
+                rate = max(self.min_rate, self.rate * self.decrease)
+            else:
+                self.successes += 1
+                # Slow start: +0.5 per success grows the rate ~1.6x per second;
+                # then +increase per second of successes at the current rate
+                step = 0.5 if self._slow_start else self.increase / self.rate
+                rate = min(self.max_rate, self.rate + step)
+            if rate != self.rate:
+                self.rate = rate
+                self.bucket.set_rate(rate)
+
+    def stats(self):
+        return {"rate": round(self.rate, 2), "successes": self.successes, "congestion": self.congestion}
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff for the given retry (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:  # HTTP-date form; fall back to our own backoff
+        return None
+
+
+def _not_sent(error):
+    """True if a requests exception happened before the request reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class PacedClient:
+    """A pooled requests.Session whose requests are paced and retried by a controller."""
+
+    def __init__(self, controller=None, retries=5, pool_size=16, timeout=60, headers=None):
+        self.controller = controller or AdaptiveRateController()
+        self.retries = retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.retried = 0
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            self.controller.acquire()
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.controller.record(None, time.monotonic() - started)
+                # Anything past connecting may have reached the API; only resend what is safe to
+                safe = method.upper() in IDEMPOTENT_METHODS or _not_sent(e)
+                if not safe or attempt >= self.retries:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{method} {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                self.controller.record(response.status_code, time.monotonic() - started)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+                delay = backoff_delay(attempt)
+                retry_after = _retry_after(response)
+                if retry_after is not None:
+                    self.controller.bucket.pause(retry_after)
+                    delay = max(delay, retry_after)
+                logger.warning(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+            attempt += 1
+            self.retried += 1
+            time.sleep(delay)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def stats(self):
+        return {**self.controller.stats(), "retries": self.retried}
+
+    def close(self):
+        self.session.close()
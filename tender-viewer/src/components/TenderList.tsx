@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { useNavigate, useParams, useLocation } from 'react-router-dom';
 import useSWR from 'swr';
 import TenderDetail from './TenderDetail';
@@ -31,6 +31,8 @@ const SkeletonCard = () => (
 const TenderList: React.FC = () => {
     // State for Link-based API Params
     const [searchTerm, setSearchTerm] = useState('');
+    const [searchInput, setSearchInput] = useState('');
+    const [showSuggestions, setShowSuggestions] = useState(false);
     const [sortConfig, setSortConfig] = useState<{ key: string, direction: 'asc' | 'desc' }>({ key: 'startDate', direction: 'desc' });
     const [statusFilter, setStatusFilter] = useState<string>('all');
     const [hasDate, setHasDate] = useState<string>('yes');
@@ -80,6 +82,27 @@ const TenderList: React.FC = () => {
 
     const { data: statusCounts } = useSWR('/api/2.4/tenders/meta/statuses', fetcher);
 
+    // Typeahead: keystrokes only hit the /suggest prefix index; the list query
+    // follows once typing pauses (or on Enter)
+    useEffect(() => {
+        const timer = setTimeout(() => {
+            if (searchInput.trim() !== searchTerm) {
+                setSearchTerm(searchInput.trim());
+                setPage(1); // Reset to page 1 on search
+            }
+        }, 400);
+        return () => clearTimeout(timer);
+    }, [searchInput]); // eslint-disable-line react-hooks/exhaustive-deps
+
+    const suggestQuery = searchInput.trim();
+    const { data: suggestData } = useSWR(
+        suggestQuery.length >= 2 ? `/api/2.4/suggest?${new URLSearchParams({ q: suggestQuery, limit: '8' }).toString()}` : null,
+        fetcher,
+        { keepPreviousData: true }
+    );
+    const suggestions = suggestQuery.length >= 2 ? suggestData?.data || [] : [];
+    const suggestionKinds: Record<string, string> = { title: 'Title', tenderId: 'ID', bidNumber: 'Bid #', supplier: 'Supplier' };
+
     // Fetch Recent Tenders (Top 3, Val > 0)
     const recentQuery = new URLSearchParams({
         limit: '3',
@@ -343,21 +366,66 @@ const TenderList: React.FC = () => {
                 gap: '1rem',
                 alignItems: 'center'
             }}>
-                <input
-                    type="text"
-                    placeholder="Search by Title or ID..."
-                    value={searchTerm}
-                    onChange={(e) => { setSearchTerm(e.target.value); setPage(1); }} // Reset to page 1 on search
-                    style={{
-                        padding: '0.8rem',
-                        borderRadius: '4px',
-                        border: '1px solid rgba(255,255,255,0.1)',
-                        background: 'rgba(0,0,0,0.2)',
-                        color: 'white',
-                        width: '100%',
-                        boxSizing: 'border-box'
-                    }}
-                />
+                <div style={{ position: 'relative' }}>
+                    <input
+                        type="text"
+                        placeholder="Search by Title, ID, Bid # or Supplier..."
+                        value={searchInput}
+                        onChange={(e) => { setSearchInput(e.target.value); setShowSuggestions(true); }}
+                        onFocus={() => setShowSuggestions(true)}
+                        onBlur={() => setShowSuggestions(false)}
+                        onKeyDown={(e) => {
+                            if (e.key === 'Enter') {
+                                setSearchTerm(searchInput.trim());
+                                setPage(1);
+                                setShowSuggestions(false);
+                            } else if (e.key === 'Escape') {
+                                setShowSuggestions(false);
+                            }
+                        }}
+                        style={{
+                            padding: '0.8rem',
+                            borderRadius: '4px',
+                            border: '1px solid rgba(255,255,255,0.1)',
+                            background: 'rgba(0,0,0,0.2)',
+                            color: 'white',
+                            width: '100%',
+                            boxSizing: 'border-box'
+                        }}
+                    />
+                    {showSuggestions && suggestions.length > 0 && (
+                        <div style={{
+                            position: 'absolute',
+                            top: '100%',
+                            left: 0,
+                            right: 0,
+                            zIndex: 10,
+                            marginTop: '0.25rem',
+                            background: '#222',
+                            border: '1px solid rgba(255,255,255,0.1)',
+                            borderRadius: '4px',
+                            overflow: 'hidden'
+                        }}>
+                            {suggestions.map((s: any) => (
+                                <div
+                                    key={`${s.kind}:${s.label}`}
+                                    // onMouseDown fires before the input's onBlur hides the list
+                                    onMouseDown={() => navigate(`/tenders/${s.tenderId}`)}
+                                    className="table-row"
+                                    style={{ display: 'flex', justifyContent: 'space-between', gap: '1rem', padding: '0.6rem 0.8rem', cursor: 'pointer' }}
+                                >
+                                    <span style={{ overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }}>
+                                        {s.kind === 'title' ? formatTitle(s.label) : s.label}
+                                    </span>
+                                    <span style={{ fontSize: '0.75rem', color: 'var(--text-secondary)', whiteSpace: 'nowrap' }}>
+                                        {suggestionKinds[s.kind] || s.kind}
+                                        {s.kind === 'supplier' && s.tenders > 1 ? ` · ${s.tenders} tenders` : ''}
+                                    </span>
+                                </div>
+                            ))}
+                        </div>
+                    )}
+                </div>
 
                 <select
                     value={statusFilter}
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import requests
+
+# Unknown IDs must come back as 404 (not a 500) from the explorer API,
+# including the contract lookup's fallback scan of tender documents
+API_BASE = os.getenv("API_BASE", "http://localhost:8000")
+UNKNOWN_ID = "ocds-does-not-exist-0000"
+
+failed = False
+
+print("Fetching unknown contract...")
+resp = requests.get(f"{API_BASE}/contracts/{UNKNOWN_ID}")
+print(f"Status Code: {resp.status_code}")
+if resp.status_code != 404:
+    print(f"Expected 404, got: {resp.text}")
+    failed = True
+
+print("Fetching unknown contract (shallow)...")
+resp = requests.get(f"{API_BASE}/contracts/{UNKNOWN_ID}", params={"shallow": "true"})
+print(f"Status Code: {resp.status_code}")
+if resp.status_code != 404:
+    print(f"Expected 404, got: {resp.text}")
+    failed = True
+
+sys.exit(1 if failed else 0)
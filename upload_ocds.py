@@ -3,9 +3,12 @@ import sys
 import json
 import argparse
 import logging
-import requests
-import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from itertools import islice
+
+from rate_control import AdaptiveRateController, PacedClient
 
 # Configuration
 API_HOST = "http://localhost:6543"
@@ -223,7 +226,16 @@ def transform_release_to_tender(release):
 
     return {"data": payload}
 
-def worker(line, dry_run=False):
+def make_client(max_rate=50.0, retries=5, pool_size=16):
+    """Pooled API client, paced to what the API sustains up to max_rate requests/s."""
+    return PacedClient(AdaptiveRateController(max_rate=max_rate), retries=retries,
+                       pool_size=pool_size, headers=HEADERS)
+
+def add_rate_arguments(parser):
+    parser.add_argument('--max-rate', type=float, default=50.0, help='Ceiling on requests per second')
+    parser.add_argument('--retries', type=int, default=5, help='Retries of throttled or failed requests')
+
+def worker(line, dry_run=False, client=None):
     try:
         record = json.loads(line)
         if 'compiledRelease' not in record:
@@ -233,11 +245,11 @@ def worker(line, dry_run=False):
         payload = transform_release_to_tender(release)
         
         if dry_run:
+            # The caller prints it, so output from parallel workers does not interleave
             logger.info(f"Dry Run: Prepared payload for {release.get('ocid')}")
-            print(json.dumps(payload, indent=2))
-            return True, "Dry Run"
+            return True, json.dumps(payload, indent=2)
             
-        response = requests.post(API_URL, json=payload, headers=HEADERS)
+        response = client.post(API_URL, json=payload)
         if response.status_code == 201:
             logger.info(f"Successfully created tender: {response.json()['data']['id']} (URL: {response.headers.get('Location')})")
             return True, response.json()['data']['id']
@@ -249,35 +261,110 @@ def worker(line, dry_run=False):
         logger.error(f"Error processing record: {e}")
         return False, str(e)
 
+# --- Parallel workers ---
+# worker() is self-contained, so lines can be spread over a pool: threads
+# share one paced client (uploads are I/O bound, and the rate controller is
+# thread-safe), processes each build their own (dry-run transforms are CPU
+# bound). Lines go to the pool in batches and at most QUEUE_DEPTH batches per
+# worker wait at once, so stdin is read only as fast as the pool drains it.
+
+QUEUE_DEPTH = 2
+PROCESS_BATCH = 64
+
+_process_client = None
+
+def _init_process(max_rate, retries, dry_run):
+    global _process_client
+    if not dry_run:
+        _process_client = make_client(max_rate, retries, pool_size=1)
+
+def run_batch(lines, dry_run=False, client=None):
+    client = client or _process_client
+    return [worker(line, dry_run, client) for line in lines]
+
+def read_lines(stream, limit=0):
+    """Non-empty input lines, at most `limit` of them (0 for all)."""
+    lines = (line for line in stream if line.strip())
+    return islice(lines, limit) if limit > 0 else lines
+
+def _batches(lines, size):
+    while True:
+        batch = list(islice(lines, size))
+        if not batch:
+            return
+        yield batch
+
+def run_parallel(lines, workers, dry_run=False, client=None, processes=False, ordered=False,
+                 max_rate=50.0, retries=5):
+    """
+    (ok, msg) of each line, processed by `workers` threads (or processes). With
+    `ordered`, results come in input order; otherwise as they complete.
+    """
+    if processes:
+        # Each process paces itself, so they share the ceiling
+        executor = ProcessPoolExecutor(workers, initializer=_init_process,
+                                       initargs=(max_rate / workers, retries, dry_run))
+        batch_size = PROCESS_BATCH
+    else:
+        executor = ThreadPoolExecutor(workers, thread_name_prefix='upload')
+        batch_size = 1
+
+    pending = deque()
+    with executor:
+        for batch in _batches(iter(lines), batch_size):
+            while len(pending) >= workers * QUEUE_DEPTH:
+                if ordered:
+                    yield from pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield from future.result()
+            pending.append(executor.submit(run_batch, batch, dry_run, None if processes else client))
+        while pending:
+            yield from pending.popleft().result()
+
 def main():
     parser = argparse.ArgumentParser(description='Upload OCDS data to OpenProcurement API')
     parser.add_argument('--limit', type=int, default=0, help='Max records to process (0 for unlimited)')
     parser.add_argument('--dry-run', action='store_true', help='Do not actually upload')
+    parser.add_argument('--workers', type=int, default=1, help='Records processed in parallel')
+    parser.add_argument('--processes', action='store_true',
+                        help='Use worker processes instead of threads (for CPU-bound --dry-run transforms)')
+    parser.add_argument('--ordered', action='store_true', help='Report results in input order')
+    add_rate_arguments(parser)
     args = parser.parse_args()
     
     count = 0
     success = 0
+    errors = Counter()
+    # One pooled connection per worker thread
+    client = make_client(args.max_rate, args.retries, pool_size=max(args.workers, 1))
     
     logger.info("Starting upload process...")
     
-    for line in sys.stdin:
-        if args.limit > 0 and count >= args.limit:
-            break
-            
-        # Optional: skip empty lines
-        if not line.strip():
-            continue
-            
-        ok, msg = worker(line, args.dry_run)
+    lines = read_lines(sys.stdin, args.limit)
+    if args.workers > 1:
+        results = run_parallel(lines, args.workers, args.dry_run, client, args.processes, args.ordered,
+                               args.max_rate, args.retries)
+    else:
+        # Pacing is adaptive (see rate_control.py) instead of a fixed sleep
+        results = (worker(line, args.dry_run, client) for line in lines)
+
+    for ok, msg in results:
         count += 1
         if ok:
             success += 1
-        
-        # Rate limiting to be nice to sandbox
-        if not args.dry_run:
-             time.sleep(0.5)
+            if args.dry_run:
+                print(msg)
+        else:
+            errors[msg[:100]] += 1
 
-    logger.info(f"Finished. Total processed: {count}. Success: {success}.")
+    client.close()
+    logger.info(f"Finished. Total processed: {count}. Success: {success}. Errors: {count - success}. "
+                f"Client: {client.stats()}")
+    for msg, n in errors.most_common(5):
+        logger.info(f"  {n} x {msg}")
 
 if __name__ == '__main__':
     main()